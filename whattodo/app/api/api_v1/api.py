@@ -5,7 +5,10 @@ from app.api.api_v1.endpoints import (
     follows,
     likes,
     login,
+    metrics,
+    search,
     stats,
+    sync,
     tasks,
     timeline,
     users,
@@ -18,4 +21,7 @@ api_router.include_router(tasks.router, prefix="/tasks", tags=["tasks"])
 api_router.include_router(follows.router, prefix="/users", tags=["follows"])
 api_router.include_router(likes.router, prefix="/tasks", tags=["likes"])
 api_router.include_router(timeline.router, prefix="/timeline", tags=["timeline"])
+api_router.include_router(search.router, prefix="/search", tags=["search"])
 api_router.include_router(stats.router, prefix="/stats", tags=["stats"])
+api_router.include_router(sync.router, prefix="/sync", tags=["sync"])
+api_router.include_router(metrics.router, prefix="/metrics", tags=["metrics"])
@@ -8,6 +8,9 @@ from app.api import deps
 from app.models.user import User
 from app.models.user_follow import UserFollow
 from app.schemas.user import User as UserSchema
+from app.services import changes as changes_service
+from app.services import follow_graph
+from app.services import timeline as timeline_service
 
 router = APIRouter()
 
@@ -51,7 +54,11 @@ def follow_user(
     # Create follow relationship
     follow = UserFollow(follower_id=current_user.id, followed_id=user_id)
     db.add(follow)
+    timeline_service.backfill_follow(db, current_user.id, user_id)
+    changes_service.record_follow_change(db, current_user.id, user_id)
+    version = follow_graph.bump_version(db)
     db.commit()
+    follow_graph.apply_follow(current_user.id, user_id, True, version)
 
     return {"message": f"Now following user {user_id}"}
 
@@ -88,36 +95,38 @@ def unfollow_user(
 
     # Remove follow relationship
     db.delete(follow)
+    timeline_service.prune_follow(db, current_user.id, user_id)
+    changes_service.record_follow_change(db, current_user.id, user_id, deleted=True)
+    version = follow_graph.bump_version(db)
     db.commit()
+    follow_graph.apply_follow(current_user.id, user_id, False, version)
 
     return {"message": f"Unfollowed user {user_id}"}
 
 
 @router.get("/followers", response_model=List[UserSchema])
 def get_followers(
-    db: Session = Depends(deps.get_db),
+    db: Session = Depends(deps.get_read_only_db),
     current_user: User = Depends(deps.get_current_active_user),
 ) -> Any:
     """
     Get all followers of the current user.
     """
-    follows = db.query(UserFollow).filter(UserFollow.followed_id == current_user.id).all()
-    follower_ids = [follow.follower_id for follow in follows]
-    followers = db.query(User).filter(User.id.in_(follower_ids)).all()
+    follower_ids = follow_graph.get_graph(db).followers(current_user.id)
+    followers = db.query(User).filter(User.id.in_(list(follower_ids))).all() if follower_ids else []
 
     return followers
 
 
 @router.get("/following", response_model=List[UserSchema])
 def get_following(
-    db: Session = Depends(deps.get_db),
+    db: Session = Depends(deps.get_read_only_db),
     current_user: User = Depends(deps.get_current_active_user),
 ) -> Any:
     """
     Get all users that the current user is following.
     """
-    follows = db.query(UserFollow).filter(UserFollow.follower_id == current_user.id).all()
-    following_ids = [follow.followed_id for follow in follows]
-    following = db.query(User).filter(User.id.in_(following_ids)).all()
+    following_ids = follow_graph.get_graph(db).following(current_user.id)
+    following = db.query(User).filter(User.id.in_(list(following_ids))).all() if following_ids else []
 
     return following
@@ -1,14 +1,20 @@
 # app/api/api_v1/endpoints/likes.py
-from typing import Any, List
+from typing import Any, List, Optional, Union
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session
 
 from app.api import deps
-from app.models.task import Task
-from app.models.task_like import TaskLike
+from app.api.pagination import set_next_cursor
+from app.api.responses import fast_json
+from app.core.config import settings
 from app.models.user import User
 from app.schemas.task_like import TaskLike as TaskLikeSchema  # noqa: F401
+from app.schemas.task_like import TaskLikeLookup, TaskLikeSummary
+from app.schemas.user import UserSummary
+from app.services import changes as changes_service
+from app.services import like_buffer
+from app.services import likes as likes_service
 
 router = APIRouter()
 
@@ -17,33 +23,35 @@ router = APIRouter()
 def like_task(
     task_id: int,
     db: Session = Depends(deps.get_db),
+    read_db: Session = Depends(deps.get_read_only_db),
     current_user: User = Depends(deps.get_current_active_user),
 ) -> Any:
     """
     Like a task.
+
+    Liking a task that is already liked changes nothing and succeeds. With LIKE_WRITE_BEHIND on, the like
+    is written within LIKE_FLUSH_INTERVAL_MS after the response.
     """
-    # Check if task exists
-    task = db.query(Task).filter(Task.id == task_id).first()
-    if not task:
+    buffer = like_buffer.get_buffer()
+    if buffer is not None:
+        # 書き込み遅延: 存在確認だけを読み込み用の接続で行い、書き込みはバッファに任せる
+        if not likes_service.task_exists(read_db, task_id):
+            raise HTTPException(
+                status_code=404,
+                detail="Task not found",
+            )
+        buffer.add(task_id, current_user.id, liked=True)
+    elif likes_service.add_like(db, task_id, current_user.id):
+        owner_id = likes_service.adjust_likes_count(db, task_id, 1)
+        changes_service.record_like_change(db, task_id, current_user.id, owner_id)
+        db.commit()
+    # 挿入されなかった場合だけ、いいね済みかタスクが存在しないかを確認する
+    elif not likes_service.task_exists(db, task_id):
         raise HTTPException(
             status_code=404,
             detail="Task not found",
         )
 
-    # Check if already liked
-    like = db.query(TaskLike).filter(TaskLike.task_id == task_id, TaskLike.user_id == current_user.id).first()
-
-    if like:
-        raise HTTPException(
-            status_code=400,
-            detail="Already liked this task",
-        )
-
-    # Create like
-    like = TaskLike(task_id=task_id, user_id=current_user.id)
-    db.add(like)
-    db.commit()
-
     return {"message": f"Liked task {task_id}"}
 
 
@@ -51,75 +59,112 @@ def like_task(
 def unlike_task(
     task_id: int,
     db: Session = Depends(deps.get_db),
+    read_db: Session = Depends(deps.get_read_only_db),
     current_user: User = Depends(deps.get_current_active_user),
 ) -> Any:
     """
     Unlike a task.
+
+    Unliking a task that is not liked changes nothing and succeeds.
     """
-    # Check if task exists
-    task = db.query(Task).filter(Task.id == task_id).first()
-    if not task:
+    buffer = like_buffer.get_buffer()
+    if buffer is not None:
+        if not likes_service.task_exists(read_db, task_id):
+            raise HTTPException(
+                status_code=404,
+                detail="Task not found",
+            )
+        buffer.add(task_id, current_user.id, liked=False)
+    elif likes_service.remove_like(db, task_id, current_user.id):
+        owner_id = likes_service.adjust_likes_count(db, task_id, -1)
+        changes_service.record_like_change(db, task_id, current_user.id, owner_id, deleted=True)
+        db.commit()
+    elif not likes_service.task_exists(db, task_id):
         raise HTTPException(
             status_code=404,
             detail="Task not found",
         )
 
-    # Check if liked
-    like = db.query(TaskLike).filter(TaskLike.task_id == task_id, TaskLike.user_id == current_user.id).first()
-
-    if not like:
-        raise HTTPException(
-            status_code=400,
-            detail="Task not liked",
-        )
-
-    # Remove like
-    db.delete(like)
-    db.commit()
-
     return {"message": f"Unliked task {task_id}"}
 
 
 @router.get("/{task_id}/likes", response_model=int)
 def get_task_likes_count(
     task_id: int,
-    db: Session = Depends(deps.get_db),
+    db: Session = Depends(deps.get_read_only_db),
 ) -> Any:
     """
     Get task likes count.
+
+    With LIKE_WRITE_BEHIND on, likes and unlikes still buffered in this worker are included.
     """
-    # Check if task exists
-    task = db.query(Task).filter(Task.id == task_id).first()
-    if not task:
+    likes_count = like_buffer.read_likes_count(db, task_id)
+    if likes_count is None:
         raise HTTPException(
             status_code=404,
             detail="Task not found",
         )
 
-    # Count likes
-    likes_count = db.query(TaskLike).filter(TaskLike.task_id == task_id).count()
-
     return likes_count
 
 
-@router.get("/{task_id}/likes/users", response_model=List[int])
+@router.get("/{task_id}/likes/users", response_model=Union[List[int], List[UserSummary]])
 def get_task_likes_users(
     task_id: int,
-    db: Session = Depends(deps.get_db),
+    response: Response,
+    skip: int = 0,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    include_users: bool = False,
+    db: Session = Depends(deps.get_read_only_db),
 ) -> Any:
     """
-    Get users who liked a task.
+    Get users who liked a task, most recent first.
+
+    Returns user IDs, or {id, username} summaries with include_users=true. Pass the X-Next-Cursor
+    header of the previous page as cursor to page with a keyset instead of skip. With LIKE_WRITE_BEHIND
+    on, the list only has committed likes, so it may lag the likes count by up to LIKE_FLUSH_INTERVAL_MS.
     """
-    # Check if task exists
-    task = db.query(Task).filter(Task.id == task_id).first()
-    if not task:
+    rows = likes_service.get_likers(db, task_id, skip=skip, limit=limit, cursor=cursor, with_users=include_users)
+    # 空のページの場合だけタスクの存在を確認する
+    if not rows and not likes_service.task_exists(db, task_id):
         raise HTTPException(
             status_code=404,
             detail="Task not found",
         )
+    set_next_cursor(response, rows, limit)
 
-    # Get user IDs who liked the task
-    likes = db.query(TaskLike).filter(TaskLike.task_id == task_id).all()
-    user_ids = [like.user_id for like in likes]
+    if include_users:
+        return fast_json(response, [{"id": row.user_id, "username": row.username} for row in rows])
+    return fast_json(response, [row.user_id for row in rows])
+
+
+@router.post("/likes/lookup", response_model=List[TaskLikeSummary])
+def lookup_task_likes(
+    lookup_in: TaskLikeLookup,
+    db: Session = Depends(deps.get_read_only_db),
+    current_user: User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Get likes count and whether the current user liked it for several tasks at once.
+
+    Results follow the order of task_ids. Unknown tasks get status 404 in their result instead of
+    failing the request.
+    """
+    task_ids = lookup_in.task_ids
+    if len(task_ids) > settings.TASK_LIKES_LOOKUP_MAX_IDS:
+        raise HTTPException(
+            status_code=400, detail=f"A lookup can contain at most {settings.TASK_LIKES_LOOKUP_MAX_IDS} task IDs"
+        )
 
-    return user_ids
+    summaries = like_buffer.overlay_likes(
+        current_user.id, likes_service.get_like_summaries(db, current_user.id, task_ids)
+    )
+    results = []
+    for task_id in task_ids:
+        if task_id in summaries:
+            likes_count, liked_by_me = summaries[task_id]
+            results.append({"task_id": task_id, "status": 200, "likes_count": likes_count, "liked_by_me": liked_by_me})
+        else:
+            results.append({"task_id": task_id, "status": 404, "detail": "Task not found"})
+    return results
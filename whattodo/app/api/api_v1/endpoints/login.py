@@ -1,13 +1,13 @@
 # app/api/api_v1/endpoints/login.py
 from datetime import timedelta
-from typing import Any
+from typing import Any, Optional
 
 from fastapi import APIRouter, Depends, HTTPException
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 
 from app.api import deps
-from app.core import security
+from app.core import hashing, security
 from app.core.config import settings
 from app.models.user import User
 from app.schemas.token import Token
@@ -15,16 +15,34 @@ from app.schemas.token import Token
 router = APIRouter()
 
 
+def find_user(db: Session, login: str) -> Optional[User]:
+    user = db.query(User).filter(User.email == login).first()
+    if not user:
+        user = db.query(User).filter(User.username == login).first()
+    return user
+
+
 @router.post("/login/access-token", response_model=Token)
-def login_access_token(db: Session = Depends(deps.get_db), form_data: OAuth2PasswordRequestForm = Depends()) -> Any:
+async def login_access_token(
+    db: Any = Depends(deps.get_read_db), form_data: OAuth2PasswordRequestForm = Depends()
+) -> Any:
     """
     OAuth2 compatible token login, get an access token for future requests
     """
-    user = db.query(User).filter(User.email == form_data.username).first()
-    if not user:
-        user = db.query(User).filter(User.username == form_data.username).first()
+    user = await deps.run_db(db, find_user, form_data.username)
+    # ハッシュを待つ間は接続を返しておく
+    await deps.release_db(db)
+
+    try:
+        password_ok = user is not None and await hashing.verify_password(
+            form_data.password, str(user.hashed_password)
+        )
+    except hashing.PasswordHashingBusy:
+        raise HTTPException(
+            status_code=503, detail="Too many login attempts, retry shortly", headers={"Retry-After": "1"}
+        )
 
-    if not user or not security.verify_password(form_data.password, str(user.hashed_password)):
+    if not password_ok:
         raise HTTPException(status_code=400, detail="Incorrect email/username or password")
 
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
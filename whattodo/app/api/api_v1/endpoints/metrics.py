@@ -0,0 +1,34 @@
+# app/api/api_v1/endpoints/metrics.py
+from typing import Any
+
+from fastapi import APIRouter, Depends, HTTPException
+
+from app.api import deps
+from app.core import hashing
+from app.core.config import settings
+from app.db import pool_metrics
+from app.models.user import User
+from app.services import follow_graph, like_buffer
+
+router = APIRouter()
+
+
+@router.get("/", response_model=dict)
+def read_metrics(
+    current_user: User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Get in-process cache, password hashing, connection pool, like buffer and follow graph metrics for this worker.
+
+    Disabled (404) unless METRICS_ENABLED is set; enable it only where the API is not public.
+    """
+    if not settings.METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Not Found")
+    return {
+        "token_cache": deps.token_cache.stats(),
+        "principal_cache": deps.principal_cache.stats(),
+        "password_hashing": hashing.metrics.stats(),
+        "db_pools": pool_metrics.snapshot(),
+        "like_buffer": like_buffer.stats(),
+        "follow_graph": follow_graph.stats(),
+    }
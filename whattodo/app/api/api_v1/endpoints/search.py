@@ -0,0 +1,44 @@
+# app/api/api_v1/endpoints/search.py
+from typing import Any, Dict, List
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+
+from app.api import deps
+from app.api.responses import FastJSONResponse
+from app.models.user import User
+from app.schemas.timeline import TimelineItem
+from app.services import search as search_service
+from app.services.feed import hydrate_timeline_items
+
+router = APIRouter()
+
+
+def read_search_results(db: Session, user_id: int, q: str, *, skip: int, limit: int) -> List[Dict[str, Any]]:
+    if not search_service.is_supported(db):
+        raise HTTPException(status_code=501, detail="Search is only available on SQLite")
+    try:
+        tasks = search_service.search_tasks(db, user_id, q, skip=skip, limit=limit)
+    except search_service.InvalidSearchQuery as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+    # Add likes count and whether current user liked it for the whole page at once
+    return hydrate_timeline_items(db, tasks, user_id)
+
+
+@router.get("/tasks", response_model=List[TimelineItem])
+async def search_tasks(
+    q: str = Query(..., min_length=1, max_length=200),
+    skip: int = 0,
+    limit: int = Query(20, le=100),
+    db: Any = Depends(deps.get_read_db),
+    current_user: User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Search task titles and descriptions, best match first.
+
+    Only tasks the current user may see are returned: their own, public ones, and followers-only
+    tasks of users they follow. Every whitespace-separated term (at least 3 characters) must match.
+    """
+    items = await deps.run_db(db, read_search_results, current_user.id, q, skip=skip, limit=limit)
+    return FastJSONResponse(items)
@@ -0,0 +1,59 @@
+# app/api/api_v1/endpoints/sync.py
+from typing import Any, Dict
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+
+from app.api import deps
+from app.models.task import Task
+from app.models.user import User
+from app.schemas.sync import SyncResponse
+from app.services import changes as changes_service
+
+router = APIRouter()
+
+
+def read_sync_delta(db: Session, user_id: int, since: int, limit: int) -> Dict[str, Any]:
+    changes, has_more = changes_service.read_changes(db, user_id, since, limit)
+
+    task_changes = [c for c in changes if c.entity == changes_service.TASK]
+    upserted_ids = [c.entity_id for c in task_changes if not c.deleted]
+    tasks = []
+    if upserted_ids:
+        tasks = db.query(Task).filter(Task.id.in_(upserted_ids), Task.owner_id == user_id).all()
+    # 記録後に削除されたタスクも削除として返す
+    live_ids = {task.id for task in tasks}
+    deleted_task_ids = [c.entity_id for c in task_changes if c.entity_id not in live_ids]
+
+    return {
+        "watermark": changes[-1].seq if changes else since,
+        "has_more": has_more,
+        "tasks": tasks,
+        "deleted_task_ids": deleted_task_ids,
+        "likes": [
+            {"task_id": c.entity_id, "user_id": c.related_id, "deleted": c.deleted}
+            for c in changes
+            if c.entity == changes_service.LIKE
+        ],
+        "follows": [
+            {"follower_id": c.entity_id, "followed_id": c.related_id, "deleted": c.deleted}
+            for c in changes
+            if c.entity == changes_service.FOLLOW
+        ],
+    }
+
+
+@router.get("/", response_model=SyncResponse)
+async def sync_changes(
+    since: int = Query(0, ge=0),
+    limit: int = Query(500, ge=1, le=1000),
+    db: Any = Depends(deps.get_read_db),
+    current_user: User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Get the current user's tasks, likes and follows changed since a watermark.
+
+    Start with since=0 and pass the returned watermark next time. Deleted tasks, removed likes
+    and unfollows are reported as tombstones; each entity appears at most once, in its latest state.
+    """
+    return await deps.run_db(db, read_sync_delta, current_user.id, since, limit)
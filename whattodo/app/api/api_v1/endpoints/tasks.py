@@ -1,27 +1,135 @@
 # app/api/api_v1/endpoints/tasks.py
-from typing import Any, List
+from datetime import datetime
+from typing import Any, Dict, List, Literal, Optional, Set
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from sqlalchemy.orm import Session, load_only
 
 from app import models, schemas
-from app.api import deps
+from app.api import conditional, deps
+from app.api.pagination import fetch_page_nulls_last, paginate, set_next_cursor
+from app.api.responses import fast_json
+from app.core.config import settings
+from app.services import changes as changes_service
+from app.services import stats as stats_service
+from app.services import timeline as timeline_service
 
 router = APIRouter()
 
 
-@router.get("/", response_model=List[schemas.Task])
-def read_tasks(
-    db: Session = Depends(deps.get_db),
+# fields= で選べる項目
+TASK_FIELDS = tuple(schemas.TaskListItem.model_fields)
+
+
+def parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    if not fields:
+        return None
+    selected = [field.strip() for field in fields.split(",") if field.strip()]
+    unknown = [field for field in selected if field not in TASK_FIELDS]
+    if unknown or not selected:
+        raise HTTPException(
+            status_code=400, detail=f"Unknown fields: {', '.join(unknown)}; choose from {', '.join(TASK_FIELDS)}"
+        )
+    return selected
+
+
+def read_own_tasks(
+    db: Session,
+    response: Response,
+    user_id: int,
+    *,
+    skip: int,
+    limit: int,
+    cursor: Optional[str],
+    completed: Optional[bool] = None,
+    privacy_level: Optional[str] = None,
+    due_after: Optional[datetime] = None,
+    due_before: Optional[datetime] = None,
+    sort: str = "created_at",
+    descending: bool = False,
+    fields: Optional[List[str]] = None,
+) -> List[Dict[str, Any]]:
+    query = db.query(models.Task).filter(models.Task.owner_id == user_id)
+    if completed is not None:
+        query = query.filter(models.Task.is_completed == completed)
+    if privacy_level is not None:
+        query = query.filter(models.Task.privacy_level == privacy_level)
+    if due_after is not None:
+        query = query.filter(models.Task.due_date >= due_after)
+    if due_before is not None:
+        query = query.filter(models.Task.due_date <= due_before)
+    if fields:
+        # ページングに使う id と並び替えキーは常に読み込む
+        columns = {"id", sort, *fields}
+        query = query.options(load_only(*(getattr(models.Task, column) for column in columns)))
+
+    sort_col = getattr(models.Task, sort)
+    if sort == "due_date":
+        tasks = fetch_page_nulls_last(
+            query, sort_col, models.Task.id, skip=skip, limit=limit, cursor=cursor, descending=descending
+        )
+    else:
+        tasks = paginate(
+            query, sort_col, models.Task.id, skip=skip, limit=limit, cursor=cursor, descending=descending
+        ).all()
+    set_next_cursor(response, tasks, limit, sort)
+
+    # TaskListItem の項目順の辞書（FastJSONResponse でそのまま返す）
+    keys = [field for field in TASK_FIELDS if not fields or field in fields]
+    return [{key: getattr(task, key) for key in keys} for task in tasks]
+
+
+@router.get("/", response_model=List[schemas.TaskListItem], response_model_exclude_unset=True)
+async def read_tasks(
+    request: Request,
+    response: Response,
+    db: Any = Depends(deps.get_read_db),
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
+    completed: Optional[bool] = None,
+    privacy_level: Optional[str] = None,
+    due_after: Optional[datetime] = None,
+    due_before: Optional[datetime] = None,
+    sort: Literal["created_at", "due_date", "updated_at"] = "created_at",
+    order: Literal["asc", "desc"] = "asc",
+    fields: Optional[str] = None,
     current_user: models.User = Depends(deps.get_current_active_user),
 ) -> Any:
     """
-    Retrieve tasks.
+    Retrieve tasks, oldest first by default.
+
+    Filter by completion, privacy level and an inclusive due-date range, and sort by created_at,
+    due_date (tasks without a due date last) or updated_at. fields is a comma-separated list of
+    task fields to return, e.g. fields=id,title,is_completed,due_date for list views.
+
+    Pass the X-Next-Cursor header of the previous page as cursor to page with a keyset instead of skip;
+    keep the same filters and sort when you do.
+
+    The response carries an ETag; send it back as If-None-Match to get 304 while the tasks are unchanged.
     """
-    tasks = db.query(models.Task).filter(models.Task.owner_id == current_user.id).offset(skip).limit(limit).all()
-    return tasks
+    fields_list = parse_fields(fields)
+    version = await deps.run_db(db, changes_service.user_version, current_user.id)
+    unchanged = conditional.not_modified(request, response, conditional.make_etag(request, current_user.id, version))
+    if unchanged:
+        return unchanged
+    items = await deps.run_db(
+        db,
+        read_own_tasks,
+        response,
+        current_user.id,
+        skip=skip,
+        limit=limit,
+        cursor=cursor,
+        completed=completed,
+        privacy_level=privacy_level,
+        due_after=due_after,
+        due_before=due_before,
+        sort=sort,
+        descending=order == "desc",
+        fields=fields_list,
+    )
+    return fast_json(response, items)
 
 
 @router.post("/", response_model=schemas.Task)
@@ -36,6 +144,10 @@ def create_task(
     """
     task = models.Task(**task_in.dict(), owner_id=current_user.id)
     db.add(task)
+    db.flush()
+    timeline_service.fan_out_task(db, task)
+    stats_service.record_task_change(db, task.owner_id, old=None, new=stats_service.contribution(task))
+    changes_service.record_task_changes(db, task.owner_id, [task.id])
     db.commit()
     db.refresh(task)
     return task
@@ -56,11 +168,24 @@ def update_task(
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
 
+    was_visible = timeline_service.is_visible(task.privacy_level)
+    old_contribution = stats_service.contribution(task)
+
     update_data = task_in.dict(exclude_unset=True)
     for field in update_data:
         setattr(task, field, update_data[field])
 
     db.add(task)
+    db.flush()
+
+    # プライバシー変更をフォロワーのタイムラインに反映
+    if not was_visible and timeline_service.is_visible(task.privacy_level):
+        timeline_service.fan_out_task(db, task)
+    elif was_visible and not timeline_service.is_visible(task.privacy_level):
+        timeline_service.retract_task(db, task.id)
+
+    stats_service.record_task_change(db, task.owner_id, old=old_contribution, new=stats_service.contribution(task))
+    changes_service.record_task_changes(db, task.owner_id, [task.id])
     db.commit()
     db.refresh(task)
     return task
@@ -69,7 +194,7 @@ def update_task(
 @router.get("/{id}", response_model=schemas.Task)
 def read_task(
     *,
-    db: Session = Depends(deps.get_db),
+    db: Session = Depends(deps.get_read_only_db),
     id: int,
     current_user: models.User = Depends(deps.get_current_active_user),
 ) -> Any:
@@ -96,6 +221,133 @@ def delete_task(
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
 
+    timeline_service.retract_task(db, task.id)
+    stats_service.record_task_change(db, task.owner_id, old=stats_service.contribution(task), new=None)
+    # 同期中のクライアントに削除を伝えるトゥームストーン
+    changes_service.record_task_changes(db, task.owner_id, [task.id], deleted=True)
     db.delete(task)
     db.commit()
     return task
+
+
+def validate_batch(
+    operations: List[schemas.TaskBatchOperation], tasks_by_id: Dict[int, models.Task]
+) -> Dict[int, schemas.TaskBatchResult]:
+    """Failed results by index; update/delete must target an own task, each at most once."""
+    failures = {}
+    seen: Set[int] = set()
+    for index, operation in enumerate(operations):
+        if operation.op == "create":
+            continue
+        if operation.id in seen:
+            detail, status = "Task appears in more than one operation", 400
+        elif operation.id not in tasks_by_id:
+            detail, status = "Task not found", 404
+        else:
+            detail = None
+        if detail:
+            failures[index] = schemas.TaskBatchResult(index=index, op=operation.op, status=status, detail=detail)
+        seen.add(operation.id)
+    return failures
+
+
+@router.post("/batch", response_model=List[schemas.TaskBatchResult])
+def batch_tasks(
+    *,
+    db: Session = Depends(deps.get_db),
+    batch_in: schemas.TaskBatch,
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Create, update and delete several tasks in one transaction.
+
+    Every operation is validated before any is applied. If atomic is true (the default), one invalid
+    operation rejects the whole batch with 400 and the failed results; otherwise invalid operations are
+    skipped and reported in the per-item results.
+    """
+    operations = batch_in.operations
+    if len(operations) > settings.TASK_BATCH_MAX_OPERATIONS:
+        raise HTTPException(
+            status_code=400, detail=f"A batch can contain at most {settings.TASK_BATCH_MAX_OPERATIONS} operations"
+        )
+
+    # 更新・削除の対象を1クエリで取得
+    target_ids = [operation.id for operation in operations if operation.op != "create"]
+    tasks_by_id = {}
+    if target_ids:
+        tasks_by_id = {
+            task.id: task
+            for task in db.query(models.Task).filter(
+                models.Task.id.in_(target_ids), models.Task.owner_id == current_user.id
+            )
+        }
+
+    results = validate_batch(operations, tasks_by_id)
+    if results and batch_in.atomic:
+        raise HTTPException(
+            status_code=400, detail=[results[index].model_dump(mode="json") for index in sorted(results)]
+        )
+
+    created, updated, deleted = [], [], []
+    old_contributions, new_contributions = [], []
+    for index, operation in enumerate(operations):
+        if index in results:
+            continue
+        if operation.op == "create":
+            created.append((index, models.Task(**operation.task.dict(), owner_id=current_user.id)))
+            continue
+
+        task = tasks_by_id[operation.id]
+        old_contributions.append(stats_service.contribution(task))
+        if operation.op == "update":
+            updated.append((index, task, timeline_service.is_visible(task.privacy_level)))
+            for field, value in operation.task.dict(exclude_unset=True).items():
+                setattr(task, field, value)
+        else:
+            deleted.append((index, task))
+
+    # 作成・更新をまとめて1回の flush で書き込む（INSERT は RETURNING 付きの複数行 INSERT になる）
+    db.add_all([task for _, task in created])
+    db.flush()
+
+    retracted_ids = [task.id for _, task in deleted]
+    for _, task in created:
+        timeline_service.fan_out_task(db, task)
+        new_contributions.append(stats_service.contribution(task))
+    for _, task, was_visible in updated:
+        # プライバシー変更をフォロワーのタイムラインに反映
+        if not was_visible and timeline_service.is_visible(task.privacy_level):
+            timeline_service.fan_out_task(db, task)
+        elif was_visible and not timeline_service.is_visible(task.privacy_level):
+            retracted_ids.append(task.id)
+        new_contributions.append(stats_service.contribution(task))
+    timeline_service.retract_tasks(db, retracted_ids)
+
+    # 日次集計とストリークはバッチ全体の差分で1回だけ更新する
+    stats_service.record_task_change(
+        db,
+        current_user.id,
+        old=stats_service.sum_contributions(old_contributions),
+        new=stats_service.sum_contributions(new_contributions),
+    )
+    written_ids = [task.id for _, task in created] + [task.id for _, task, _ in updated]
+    changes_service.record_task_changes(db, current_user.id, written_ids)
+    changes_service.record_task_changes(db, current_user.id, [task.id for _, task in deleted], deleted=True)
+
+    # レスポンスはコミット前に作る（コミット後にタスクごとの再読み込みが走らないように）
+    for index, task in created:
+        results[index] = schemas.TaskBatchResult(
+            index=index, op="create", status=201, task=schemas.Task.model_validate(task)
+        )
+    for index, task, _ in updated:
+        results[index] = schemas.TaskBatchResult(
+            index=index, op="update", status=200, task=schemas.Task.model_validate(task)
+        )
+    for index, task in deleted:
+        results[index] = schemas.TaskBatchResult(
+            index=index, op="delete", status=200, task=schemas.Task.model_validate(task)
+        )
+        db.delete(task)
+
+    db.commit()
+    return [results[index] for index in sorted(results)]
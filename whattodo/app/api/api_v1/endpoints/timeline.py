@@ -1,108 +1,92 @@
 # app/api/api_v1/endpoints/timeline.py
-from typing import Any, List
+from typing import Any, Dict, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query  # noqa: F401
-from sqlalchemy import func
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response  # noqa: F401
 from sqlalchemy.orm import Session, joinedload
 
-from app.api import deps
+from app.api import conditional, deps
+from app.api.pagination import paginate, set_next_cursor
+from app.api.responses import fast_json
 from app.models.task import Task
-from app.models.task_like import TaskLike
 from app.models.user import User
-from app.models.user_follow import UserFollow
 from app.schemas.timeline import TimelineItem
+from app.services import like_buffer
+from app.services import timeline as timeline_service
+from app.services.feed import hydrate_timeline_items
 
 router = APIRouter()
 
 
-@router.get("/", response_model=List[TimelineItem])
-def get_timeline(
-    skip: int = 0,
-    limit: int = 100,
-    db: Session = Depends(deps.get_db),
-    current_user: User = Depends(deps.get_current_active_user),
-) -> Any:
-    """
-    Get timeline of tasks from followed users.
-    """
-    # Get IDs of users that the current user follows
-    follows = db.query(UserFollow.followed_id).filter(UserFollow.follower_id == current_user.id).all()
-    following_ids = [follow[0] for follow in follows]
+def read_home_timeline(
+    db: Session, response: Response, user_id: int, *, skip: int, limit: int, cursor: Optional[str]
+) -> List[Dict[str, Any]]:
+    # Read the materialized home timeline (own and followed users' visible tasks)
+    tasks = timeline_service.get_home_tasks(db, user_id, skip=skip, limit=limit, cursor=cursor)
+    set_next_cursor(response, tasks, limit)
 
-    # Include current user's ID to show their tasks in timeline too
-    user_ids = following_ids + [current_user.id]
+    # Add likes count and whether current user liked it for the whole page at once
+    return hydrate_timeline_items(db, tasks, user_id)
 
-    # Get tasks from these users with privacy level that allows viewing
+
+def read_public_tasks(
+    db: Session, response: Response, user_id: int, *, skip: int, limit: int, cursor: Optional[str]
+) -> List[Dict[str, Any]]:
+    # Get public tasks from all users
+    query = db.query(Task).filter(Task.privacy_level == "public")
     tasks = (
-        db.query(Task)
-        .filter(
-            Task.owner_id.in_(user_ids),
-            # Only show public tasks or followers-only tasks (current user is a follower)
-            Task.privacy_level.in_(["public", "followers"]),
-        )
-        .order_by(Task.created_at.desc())
-        .offset(skip)
-        .limit(limit)
+        paginate(query, Task.created_at, Task.id, skip=skip, limit=limit, cursor=cursor, descending=True)
         .options(joinedload(Task.owner))  # Eager load the owner relationship
         .all()
     )
+    set_next_cursor(response, tasks, limit)
 
-    # For each task, add likes count and whether current user liked it
-    timeline_items = []
-    for task in tasks:
-        # Count likes for this task
-        likes_count = db.query(func.count(TaskLike.id)).filter(TaskLike.task_id == task.id).scalar()
+    # Add likes count and whether current user liked it for the whole page at once
+    return hydrate_timeline_items(db, tasks, user_id)
 
-        # Check if current user liked this task
-        liked_by_me = (
-            db.query(TaskLike).filter(TaskLike.task_id == task.id, TaskLike.user_id == current_user.id).first()
-            is not None
-        )
 
-        # Create TimelineItem
-        timeline_item = {**task.__dict__, "owner": task.owner, "likes_count": likes_count, "liked_by_me": liked_by_me}
-
-        timeline_items.append(timeline_item)
+@router.get("/", response_model=List[TimelineItem])
+async def get_timeline(
+    request: Request,
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    db: Any = Depends(deps.get_read_db),
+    current_user: User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Get timeline of tasks from followed users.
 
-    return timeline_items
+    Pass the X-Next-Cursor header of the previous page as cursor to page with a keyset instead of skip.
+    The response carries an ETag; send it back as If-None-Match to get 304 while the timeline is unchanged.
+    """
+    # 書き込み遅延中の自分のいいねもタイムラインに反映されるのでバージョンに含める
+    version = (
+        await deps.run_db(
+            db, timeline_service.get_home_version, current_user.id, skip=skip, limit=limit, cursor=cursor
+        ),
+        like_buffer.pending_version(current_user.id),
+    )
+    unchanged = conditional.not_modified(request, response, conditional.make_etag(request, current_user.id, version))
+    if unchanged:
+        return unchanged
+    items = await deps.run_db(db, read_home_timeline, response, current_user.id, skip=skip, limit=limit, cursor=cursor)
+    return fast_json(response, items)
 
 
 @router.get("/explore", response_model=List[TimelineItem])
-def explore_public_tasks(
+async def explore_public_tasks(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(deps.get_db),
+    cursor: Optional[str] = None,
+    db: Any = Depends(deps.get_read_db),
     current_user: User = Depends(deps.get_current_active_user),
 ) -> Any:
     """
     Explore public tasks from all users.
-    """
-    # Get public tasks from all users
-    tasks = (
-        db.query(Task)
-        .filter(Task.privacy_level == "public")
-        .order_by(Task.created_at.desc())
-        .offset(skip)
-        .limit(limit)
-        .options(joinedload(Task.owner))  # Eager load the owner relationship
-        .all()
-    )
-
-    # For each task, add likes count and whether current user liked it
-    timeline_items = []
-    for task in tasks:
-        # Count likes for this task
-        likes_count = db.query(func.count(TaskLike.id)).filter(TaskLike.task_id == task.id).scalar()
-
-        # Check if current user liked this task
-        liked_by_me = (
-            db.query(TaskLike).filter(TaskLike.task_id == task.id, TaskLike.user_id == current_user.id).first()
-            is not None
-        )
 
-        # Create TimelineItem
-        timeline_item = {**task.__dict__, "owner": task.owner, "likes_count": likes_count, "liked_by_me": liked_by_me}
-
-        timeline_items.append(timeline_item)
-
-    return timeline_items
+    Pass the X-Next-Cursor header of the previous page as cursor to page with a keyset instead of skip.
+    """
+    items = await deps.run_db(db, read_public_tasks, response, current_user.id, skip=skip, limit=limit, cursor=cursor)
+    return fast_json(response, items)
@@ -1,11 +1,12 @@
 # app/api/api_v1/endpoints/users.py
-from typing import Any, List
+from typing import Any, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlalchemy.orm import Session
 
 from app.api import deps
-from app.core.security import get_password_hash
+from app.api.pagination import paginate, set_next_cursor
+from app.core import hashing
 from app.models.user import User
 from app.schemas.user import User as UserSchema
 from app.schemas.user import UserCreate
@@ -15,27 +16,26 @@ router = APIRouter()
 
 @router.get("/", response_model=List[UserSchema])
 def read_users(
-    db: Session = Depends(deps.get_db),
+    response: Response,
+    db: Session = Depends(deps.get_read_only_db),
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     current_user: User = Depends(deps.get_current_active_user),
 ) -> Any:
     """
-    Retrieve users.
+    Retrieve users, oldest first.
+
+    Pass the X-Next-Cursor header of the previous page as cursor to page with a keyset instead of skip.
     """
-    users = db.query(User).offset(skip).limit(limit).all()
+    users = paginate(
+        db.query(User), User.created_at, User.id, skip=skip, limit=limit, cursor=cursor, descending=False
+    ).all()
+    set_next_cursor(response, users, limit)
     return users
 
 
-@router.post("/", response_model=UserSchema)
-def create_user(
-    *,
-    db: Session = Depends(deps.get_db),
-    user_in: UserCreate,
-) -> Any:
-    """
-    Create new user.
-    """
+def check_user_available(db: Session, user_in: UserCreate) -> None:
     # Check if user with this email or username exists
     user = db.query(User).filter(User.email == user_in.email).first()
     if user:
@@ -51,12 +51,36 @@ def create_user(
             detail="A user with this username already exists.",
         )
 
+
+def add_user(db: Session, user_in: UserCreate, hashed_password: str) -> User:
     # Create new user
     user = User(
         email=user_in.email,
         username=user_in.username,
-        hashed_password=get_password_hash(user_in.password),
+        hashed_password=hashed_password,
     )
     db.add(user)
     db.commit()
     db.refresh(user)  # 正しいスペル
+    return user
+
+
+@router.post("/", response_model=UserSchema)
+async def create_user(
+    *,
+    db: Session = Depends(deps.get_db),
+    user_in: UserCreate,
+) -> Any:
+    """
+    Create new user.
+    """
+    await deps.run_db(db, check_user_available, user_in)
+    # ハッシュを待つ間は接続を返しておく
+    await deps.release_db(db)
+
+    try:
+        hashed_password = await hashing.get_password_hash(user_in.password)
+    except hashing.PasswordHashingBusy:
+        raise HTTPException(status_code=503, detail="Too many sign-ups, retry shortly", headers={"Retry-After": "1"})
+
+    return await deps.run_db(db, add_user, user_in, hashed_password)
@@ -1,15 +1,20 @@
 # app/api/deps.py
-from typing import Generator
+import time
+from typing import Any, AsyncGenerator, Callable, Generator, Optional, Union
 
 from fastapi import Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt  # JWTErrorを正しくインポート
 from pydantic import ValidationError
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app.core import security
+from app.core.cache import TTLCache
 from app.core.config import settings
-from app.db.session import SessionLocal
+from app.db.session import ReadSessionLocal, SessionLocal, get_async_sessionmaker
 from app.models import User  # または import app.models as models を使用
 
 # schemasモジュールが見つからないので、正しいパスを指定する必要があります
@@ -27,7 +32,64 @@ def get_db() -> Generator:
         db.close()
 
 
-def get_current_user(db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)) -> User:
+def get_read_only_db() -> Generator:
+    """Session for sync endpoints that only read; never commit through it."""
+    try:
+        db = ReadSessionLocal()
+        yield db
+    finally:
+        db.close()
+
+
+async def get_read_db() -> AsyncGenerator:
+    """
+    Session for async read endpoints: an AsyncSession when settings.ASYNC_DB is on,
+    otherwise the blocking Session (kept for comparison benchmarks). Use it through run_db.
+    """
+    if settings.ASYNC_DB:
+        async with get_async_sessionmaker()() as db:
+            yield db
+    else:
+        db = ReadSessionLocal()
+        try:
+            yield db
+        finally:
+            await run_in_threadpool(db.close)
+
+
+async def run_db(db: Union[Session, AsyncSession], fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """Run fn(session, *args, **kwargs) without blocking the event loop."""
+    if isinstance(db, AsyncSession):
+        return await db.run_sync(fn, *args, **kwargs)
+    return await run_in_threadpool(fn, db, *args, **kwargs)
+
+
+async def release_db(db: Union[Session, AsyncSession]) -> None:
+    """Return the session's connection to the pool, e.g. before a long await; loaded objects stay readable."""
+    if isinstance(db, AsyncSession):
+        await db.close()
+    else:
+        await run_in_threadpool(db.close)
+
+
+# トークン -> ユーザーID（署名検証済み）
+token_cache = TTLCache(maxsize=settings.PRINCIPAL_CACHE_SIZE, ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS)
+# ユーザーID -> セッションから切り離した User
+principal_cache = TTLCache(maxsize=settings.PRINCIPAL_CACHE_SIZE, ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS)
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def invalidate_principal(mapper, connection, target: User) -> None:
+    # 無効化・更新されたユーザーをキャッシュから外す（このプロセスのみ、他プロセスは TTL で失効）
+    principal_cache.invalidate(target.id)
+
+
+def decode_token(token: str) -> Optional[int]:
+    user_id = token_cache.get(token)
+    if user_id is not None:
+        return user_id
+
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[security.ALGORITHM])
         token_data = TokenPayload(**payload)  # schemas. を削除
@@ -36,7 +98,38 @@ def get_current_user(db: Session = Depends(get_db), token: str = Depends(oauth2_
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Could not validate credentials",
         )
-    user = db.query(User).filter(User.id == token_data.sub).first()
+    if token_data.sub is not None:
+        # トークンの有効期限を超えてキャッシュしない
+        ttl = payload["exp"] - time.time() if "exp" in payload else None
+        token_cache.set(token, token_data.sub, ttl)
+    return token_data.sub
+
+
+def load_principal(user_id: int) -> Optional[User]:
+    user = principal_cache.get(user_id)
+    if user is not None:
+        return user
+
+    db = ReadSessionLocal()
+    try:
+        user = db.query(User).filter(User.id == user_id).first()
+        if user:
+            db.expunge(user)
+            principal_cache.set(user_id, user)
+    finally:
+        db.close()
+    return user
+
+
+def get_current_user(token: str = Depends(oauth2_scheme)) -> User:
+    """
+    The authenticated user, served from the principal cache when possible.
+
+    The returned User is detached and shared between requests: read its columns only and
+    re-query it through the request session before modifying it.
+    """
+    user_id = decode_token(token)
+    user = load_principal(user_id) if user_id is not None else None
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     return user
@@ -0,0 +1,109 @@
+# app/api/pagination.py
+import base64
+from datetime import datetime
+from typing import Any, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, Response
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Query
+
+# 次ページのカーソルはレスポンスヘッダーで返す（ボディはリストのまま互換性を保つ）
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(created_at: Optional[datetime], id: int) -> str:
+    # NULL 可の並び替えキー（due_date）では値が空になる
+    raw = f"{created_at.isoformat() if created_at else ''}|{id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[Optional[datetime], int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, id = raw.rsplit("|", 1)
+        return (datetime.fromisoformat(created_at) if created_at else None), int(id)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def paginate(
+    query: Query,
+    created_col: Any,
+    id_col: Any,
+    *,
+    skip: int,
+    limit: int,
+    cursor: Optional[str],
+    descending: bool,
+) -> Query:
+    """
+    Order query by (created_at, id) and apply either the keyset cursor or the legacy offset.
+
+    skip is ignored when a cursor is given.
+    """
+    if descending:
+        query = query.order_by(created_col.desc(), id_col.desc())
+    else:
+        query = query.order_by(created_col.asc(), id_col.asc())
+
+    if cursor:
+        key = decode_cursor(cursor)
+        if key[0] is None:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        if descending:
+            query = query.filter(tuple_(created_col, id_col) < key)
+        else:
+            query = query.filter(tuple_(created_col, id_col) > key)
+    elif skip:
+        query = query.offset(skip)
+
+    return query.limit(limit)
+
+
+def fetch_page_nulls_last(
+    query: Query,
+    sort_col: Any,
+    id_col: Any,
+    *,
+    skip: int,
+    limit: int,
+    cursor: Optional[str],
+    descending: bool,
+) -> List[Any]:
+    """
+    Like paginate() for a nullable sort column, with NULLs last in either direction.
+
+    Rows with a value and rows without are read as two index range scans, so neither
+    direction needs a sort; a cursor with an empty value points into the NULL part.
+    """
+    key = decode_cursor(cursor) if cursor else None
+    items: List[Any] = []
+
+    if key is None or key[0] is not None:
+        with_value = paginate(
+            query.filter(sort_col.isnot(None)),
+            sort_col,
+            id_col,
+            skip=skip,
+            limit=limit,
+            cursor=cursor,
+            descending=descending,
+        )
+        items = with_value.all()
+        if len(items) == limit:
+            return items
+
+    without_value = query.filter(sort_col.is_(None)).order_by(id_col.desc() if descending else id_col.asc())
+    if key is not None and key[0] is None:
+        without_value = without_value.filter(id_col < key[1] if descending else id_col > key[1])
+    elif key is None and skip and not items:
+        # オフセットが値のある行をすべて飛ばした場合、残りを NULL 側に適用する
+        without_value = without_value.offset(skip - query.filter(sort_col.isnot(None)).count())
+    return items + without_value.limit(limit - len(items)).all()
+
+
+def set_next_cursor(response: Response, items: Sequence[Any], limit: int, sort_key: str = "created_at") -> None:
+    # ページが埋まっている場合のみ次ページが存在し得る
+    if items and len(items) == limit:
+        last = items[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(getattr(last, sort_key), last.id)
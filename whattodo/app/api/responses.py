@@ -0,0 +1,41 @@
+# app/api/responses.py
+# 大きなリストを返すエンドポイント用の高速な JSON レスポンス
+import json
+from datetime import date, datetime
+from typing import Any
+
+from fastapi import Response
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # orjson が無い環境では標準の json で同じ出力を作る
+    orjson = None
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    Renders content that is already plain dicts and lists (datetimes allowed) with orjson.
+
+    Returning it from an endpoint skips FastAPI's response_model validation and jsonable_encoder,
+    so build the content with exactly the fields of the route's response_model; the route keeps
+    response_model for the OpenAPI schema.
+    """
+
+    def render(self, content: Any) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(content)
+        return json.dumps(content, ensure_ascii=False, separators=(",", ":"), default=_default).encode("utf-8")
+
+
+def fast_json(response: Response, content: Any) -> FastJSONResponse:
+    fast = FastJSONResponse(content)
+    # Response を直接返すと、注入された response に設定したヘッダー（X-Next-Cursor・ETag）は引き継がれない
+    fast.headers.raw.extend(response.headers.raw)
+    return fast
@@ -0,0 +1,144 @@
+# app/cli.py
+# 管理用コマンド: python -m app.cli <command>
+import argparse
+import subprocess
+import sys
+from typing import List, Optional, Tuple
+
+from app.db import base  # noqa: F401  全モデルを登録
+from app.db import migrations
+from app.db.session import SessionLocal, get_engine
+from app.services import likes as likes_service
+from app.services import search as search_service
+from app.services import stats as stats_service
+from app.services import timeline as timeline_service
+
+
+def rebuild_timelines() -> None:
+    db = SessionLocal()
+    try:
+        timeline_service.rebuild_timelines(db)
+        db.commit()
+    finally:
+        db.close()
+    print("Rebuilt home timelines")
+
+
+def reconcile_likes() -> None:
+    db = SessionLocal()
+    try:
+        fixed = likes_service.reconcile_likes_counts(db)
+        db.commit()
+    finally:
+        db.close()
+    print(f"Fixed likes_count on {fixed} tasks")
+
+
+def rebuild_rollups() -> None:
+    db = SessionLocal()
+    try:
+        stats_service.rebuild_daily_stats(db)
+        db.commit()
+    finally:
+        db.close()
+    print("Rebuilt daily task stats")
+
+
+def rebuild_search() -> None:
+    db = SessionLocal()
+    try:
+        search_service.rebuild_index(db)
+        db.commit()
+    finally:
+        db.close()
+    print("Rebuilt task search index")
+
+
+def migrate() -> None:
+    applied = migrations.upgrade(get_engine())
+    for name in applied:
+        print(f"Applied {name}")
+    print(f"Schema is at version {migrations.MIGRATIONS[-1][0]}")
+
+
+def check_plans() -> None:
+    # fastapi のエンドポイントを読み込むので必要なときだけインポートする
+    from app.db import query_plans
+
+    if get_engine().dialect.name != "sqlite":
+        print("check-plans only supports SQLite")
+        return
+
+    db = SessionLocal()
+    try:
+        failures = query_plans.check_plans(db)
+    finally:
+        db.rollback()
+        db.close()
+
+    for name in query_plans.HOT_PATHS:
+        print(f"{'FAIL' if name in failures else 'ok'}  {name}")
+        for statement, detail in failures.get(name, []):
+            print(f"      {detail}: {' '.join(statement.split())}")
+    if failures:
+        sys.exit(1)
+
+
+def parse_import_times(stderr: str) -> List[Tuple[int, int, str]]:
+    """(self_us, cumulative_us, module) for each line of python -X importtime output."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, module = line[len("import time:") :].split("|")
+        rows.append((int(self_us), int(cumulative_us), module.rstrip()))
+    return rows
+
+
+def import_time(top: int = 25, budget_ms: Optional[float] = None) -> None:
+    # 新しいプロセスで app.main を読み込み、ワーカーのコールドスタートにかかる時間を測る
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"], capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        print(result.stderr)
+        sys.exit(result.returncode)
+
+    rows = parse_import_times(result.stderr)
+    total_ms = sum(self_us for self_us, _, _ in rows) / 1000
+    app_ms = sum(self_us for self_us, _, module in rows if module.strip().startswith("app.")) / 1000
+    print(f"import app.main: {total_ms:.1f} ms total, {app_ms:.1f} ms in app modules, {len(rows)} modules")
+    print(f"{'cumulative ms':>14} {'self ms':>9}  module")
+    for self_us, cumulative_us, module in sorted(rows, key=lambda row: row[1], reverse=True)[:top]:
+        print(f"{cumulative_us / 1000:>14.1f} {self_us / 1000:>9.1f}  {module}")
+
+    if budget_ms is not None and total_ms > budget_ms:
+        print(f"Import time {total_ms:.1f} ms exceeds the budget of {budget_ms:.1f} ms")
+        sys.exit(1)
+
+
+COMMANDS = {
+    "migrate": migrate,
+    "check-plans": check_plans,
+    "importtime": import_time,
+    "rebuild-timelines": rebuild_timelines,
+    "reconcile-likes": reconcile_likes,
+    "rebuild-rollups": rebuild_rollups,
+    "rebuild-search": rebuild_search,
+}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description="WhatToDo maintenance commands")
+    parser.add_argument("command", choices=sorted(COMMANDS))
+    parser.add_argument("--top", type=int, default=25, help="importtime: number of slowest modules to list")
+    parser.add_argument("--budget-ms", type=float, help="importtime: exit non-zero if the total exceeds this")
+    args = parser.parse_args()
+    if args.command == "importtime":
+        import_time(args.top, args.budget_ms)
+    else:
+        COMMANDS[args.command]()
+
+
+if __name__ == "__main__":
+    main()
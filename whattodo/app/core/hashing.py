@@ -0,0 +1,144 @@
+# app/core/hashing.py
+# bcrypt をイベントループ・スレッドプールの外で実行する専用エグゼキューター
+# 呼び出し側は結果を await するだけなので、待っている間はスレッドプールのスレッドも DB の接続も使わない
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from app.core import security
+from app.core.config import settings
+
+
+class PasswordHashingBusy(Exception):
+    """Raised when the hashing queue is full; endpoints map it to 503."""
+
+
+class HashingMetrics:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.completed = 0
+        self.rejected = 0
+        # 実行中＋待機中のハッシュ数
+        self.pending = 0
+        self.queue_wait_total = 0.0
+        self.queue_wait_max = 0.0
+        self.hash_time_total = 0.0
+        self.hash_time_max = 0.0
+
+    def record(self, queue_wait: float, hash_time: float) -> None:
+        with self._lock:
+            self.completed += 1
+            self.queue_wait_total += queue_wait
+            self.queue_wait_max = max(self.queue_wait_max, queue_wait)
+            self.hash_time_total += hash_time
+            self.hash_time_max = max(self.hash_time_max, hash_time)
+
+    def reject(self) -> None:
+        with self._lock:
+            self.rejected += 1
+
+    def admit(self) -> None:
+        with self._lock:
+            self.pending += 1
+
+    def leave(self) -> None:
+        with self._lock:
+            self.pending -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            completed = self.completed or 1
+            return {
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "pending": self.pending,
+                "queue_wait_avg_ms": self.queue_wait_total / completed * 1000,
+                "queue_wait_max_ms": self.queue_wait_max * 1000,
+                "hash_time_avg_ms": self.hash_time_total / completed * 1000,
+                "hash_time_max_ms": self.hash_time_max * 1000,
+            }
+
+
+metrics = HashingMetrics()
+
+# forkserver が無いプラットフォーム（Windows）では spawn
+START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+_executor: Optional[Executor] = None
+_executor_lock = threading.Lock()
+# 実行中＋待機中のハッシュ数の上限
+_slots = threading.BoundedSemaphore(settings.PASSWORD_HASH_MAX_PENDING)
+
+
+def _timed(func: Callable[..., Any], *args: Any) -> Tuple[Any, float, float]:
+    # ワーカー側で実行: (結果, 開始時刻, 所要時間)
+    started_at = time.time()
+    start = time.perf_counter()
+    result = func(*args)
+    return result, started_at, time.perf_counter() - start
+
+
+def _lower_priority(niceness: int) -> None:
+    # ワーカープロセスの初期化: CPU が足りないときはリクエストの処理を優先させる（nice が無い Windows では何もしない）
+    if niceness and hasattr(os, "nice"):
+        os.nice(niceness)
+
+
+def get_executor() -> Executor:
+    """The hashing pool; start() creates it at startup, this only creates it for scripts that skip the lifespan."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            if settings.PASSWORD_HASH_USE_PROCESSES:
+                # マルチスレッドのサーバーから fork すると、子プロセスが他のスレッドのロックを持ったまま固まることがある
+                _executor = ProcessPoolExecutor(
+                    max_workers=settings.PASSWORD_HASH_WORKERS,
+                    mp_context=multiprocessing.get_context(START_METHOD),
+                    initializer=_lower_priority,
+                    initargs=(settings.PASSWORD_HASH_NICENESS,),
+                )
+            else:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash"
+                )
+        return _executor
+
+
+async def _run(func: Callable[..., Any], *args: Any) -> Any:
+    if not _slots.acquire(blocking=False):
+        metrics.reject()
+        raise PasswordHashingBusy()
+    metrics.admit()
+    try:
+        submitted_at = time.time()
+        result, started_at, hash_time = await asyncio.wrap_future(get_executor().submit(_timed, func, *args))
+    finally:
+        metrics.leave()
+        _slots.release()
+    metrics.record(max(started_at - submitted_at, 0.0), hash_time)
+    return result
+
+
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
+    return await _run(security.verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash(password: str) -> str:
+    return await _run(security.get_password_hash, password)
+
+
+def start() -> None:
+    # lifespan から呼ぶ: リクエストを受ける前にプール（とフォークサーバー）を用意する
+    get_executor().submit(int).result()
+
+
+def shutdown() -> None:
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=True)
+            _executor = None
@@ -1,8 +1,13 @@
 # SQLAlchemyモデルをインポート
 from app.db.base_class import Base  # noqa: F401
+from app.models.cache_version import CacheVersion  # noqa: F401
+from app.models.change_log import ChangeLog  # noqa: F401
+from app.models.daily_task_stats import DailyTaskStats  # noqa: F401
 from app.models.task import Task  # noqa: F401
 from app.models.task_like import TaskLike  # noqa: F401
+from app.models.timeline_entry import PulledAuthor, TimelineEntry  # noqa: F401
 from app.models.user import User  # noqa: F401
 from app.models.user_follow import UserFollow  # noqa: F401
+from app.models.user_streak import UserStreak  # noqa: F401
 
 # 他のモデルもここにインポート
@@ -0,0 +1,12 @@
+# app/db/dialect.py
+from typing import Any
+
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+
+def insert(db: Session, table: Any) -> Any:
+    """INSERT statement with on_conflict_* support for the session's database."""
+    if db.get_bind().dialect.name == "postgresql":
+        return postgresql.insert(table)
+    return sqlite.insert(table)
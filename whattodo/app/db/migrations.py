@@ -0,0 +1,205 @@
+# app/db/migrations.py
+# バージョン付きスキーマ移行（既存の whattodo.db にも適用できる）: python -m app.cli migrate
+# 各ステップは冪等にしてあるので、途中で失敗しても再実行すればよい
+import datetime
+from typing import Callable, List, Optional, Tuple
+
+from sqlalchemy import Column, DateTime, Index, Integer, MetaData, String, Table, delete, func, inspect, select, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from sqlalchemy.schema import CreateTable
+
+from app.db import base  # noqa: F401  全モデルを登録
+from app.db.base_class import Base
+from app.models.cache_version import CacheVersion
+from app.models.change_log import ChangeLog
+from app.models.task import Task
+from app.models.task_like import TaskLike
+from app.models.user import User
+from app.models.user_follow import UserFollow
+from app.services import changes as changes_service
+from app.services import likes as likes_service
+from app.services import search as search_service
+from app.services import stats as stats_service
+from app.services import timeline as timeline_service
+
+schema_migrations = Table(
+    "schema_migrations",
+    MetaData(),
+    Column("version", Integer, primary_key=True),
+    Column("name", String, nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+
+def _index(model, name: str) -> Index:
+    return next(index for index in model.__table__.indexes if index.name == name)
+
+
+def _create_indexes(conn: Connection, *indexes: Index) -> None:
+    for index in indexes:
+        index.create(conn, checkfirst=True)
+
+
+def create_tables(conn: Connection) -> None:
+    # 新しいテーブル（とそのインデックス）だけを作成する。既存テーブルの変更は後続のステップで行う
+    Base.metadata.create_all(conn)
+
+
+def add_task_likes_count(conn: Connection) -> None:
+    columns = {column["name"] for column in inspect(conn).get_columns(Task.__tablename__)}
+    if "likes_count" not in columns:
+        conn.execute(text("ALTER TABLE task ADD COLUMN likes_count INTEGER NOT NULL DEFAULT 0"))
+    likes_service.reconcile_likes_counts(Session(bind=conn))
+
+
+def add_hot_path_indexes(conn: Connection) -> None:
+    _create_indexes(
+        conn,
+        _index(User, "ix_user_created_at"),
+        _index(Task, "ix_task_owner_id_created_at"),
+        _index(Task, "ix_task_privacy_level_created_at"),
+        _index(Task, "ix_task_owner_id_is_completed_updated_at"),
+        _index(UserFollow, "ix_userfollow_followed_id"),
+    )
+
+
+def add_unique_task_likes(conn: Connection) -> None:
+    # 重複したいいねは最も古いものだけを残してから一意インデックスを作る
+    first_likes = select(func.min(TaskLike.id)).group_by(TaskLike.task_id, TaskLike.user_id)
+    conn.execute(delete(TaskLike).where(TaskLike.id.not_in(first_likes)))
+    _create_indexes(conn, _index(TaskLike, "uq_tasklike_task_id_user_id"))
+    likes_service.reconcile_likes_counts(Session(bind=conn))
+
+
+def build_read_models(conn: Connection) -> None:
+    # 既存データからホームタイムラインと日次集計（連続記録を含む）を作る
+    db = Session(bind=conn)
+    timeline_service.rebuild_timelines(db)
+    stats_service.rebuild_daily_stats(db)
+    db.flush()
+
+
+def add_task_search(conn: Connection) -> None:
+    # FTS5 は SQLite のみ（他のデータベースでは検索エンドポイントが 501 を返す）
+    db = Session(bind=conn)
+    if search_service.is_supported(db):
+        search_service.create_index(db)
+
+
+def add_task_list_indexes(conn: Connection) -> None:
+    _create_indexes(
+        conn,
+        _index(Task, "ix_task_owner_id_due_date"),
+        _index(Task, "ix_task_owner_id_updated_at"),
+        _index(Task, "ix_task_owner_id_is_completed_due_date"),
+    )
+
+
+def add_change_log(conn: Connection) -> None:
+    # 既存のタスク・いいね・フォローを変更として記録し、since=0 の同期で全件を受け取れるようにする
+    ChangeLog.__table__.create(conn, checkfirst=True)
+    changes_service.backfill_changes(Session(bind=conn))
+
+
+def add_liker_index(conn: Connection) -> None:
+    _create_indexes(conn, _index(TaskLike, "ix_tasklike_task_id_created_at"))
+
+
+def add_cache_versions(conn: Connection) -> None:
+    CacheVersion.__table__.create(conn, checkfirst=True)
+
+
+# (バージョン, 名前, ステップ) の順序付きリスト。適用済みのステップは変更せず、新しいステップを末尾に追加する
+MIGRATIONS: List[Tuple[int, str, Callable[[Connection], None]]] = [
+    (1, "create_tables", create_tables),
+    (2, "add_task_likes_count", add_task_likes_count),
+    (3, "add_hot_path_indexes", add_hot_path_indexes),
+    (4, "add_unique_task_likes", add_unique_task_likes),
+    (5, "build_read_models", build_read_models),
+    (6, "add_task_search", add_task_search),
+    (7, "add_task_list_indexes", add_task_list_indexes),
+    (8, "add_change_log", add_change_log),
+    (9, "add_liker_index", add_liker_index),
+    (10, "add_cache_versions", add_cache_versions),
+]
+
+
+# 他のプロセスが適用中のステップを待つ時間の上限（SQLite のみ。大きな DB では build_read_models などに時間がかかる）
+LOCK_TIMEOUT_MS = 10 * 60 * 1000
+
+
+class AlreadyApplied(Exception):
+    """Another process applied the migration while this one waited for the write lock."""
+
+
+def applied_versions(engine: Engine) -> List[int]:
+    with engine.begin() as conn:
+        # 複数のワーカーが同時に起動しても失敗しないよう IF NOT EXISTS で作る
+        conn.execute(CreateTable(schema_migrations, if_not_exists=True))
+    with engine.connect() as conn:
+        return [row[0] for row in conn.execute(select(schema_migrations.c.version).order_by("version"))]
+
+
+def apply(engine: Engine, version: int, name: str, step: Callable[[Connection], None]) -> None:
+    """
+    Run one migration step and record it in the same transaction.
+
+    The version row is inserted first, which takes the write lock: a second process running the same
+    step waits for the first one's commit, then hits the primary key and raises AlreadyApplied.
+    """
+    with engine.connect() as conn:
+        if conn.dialect.name == "sqlite":
+            busy_timeout = conn.exec_driver_sql("PRAGMA busy_timeout").scalar()
+            conn.exec_driver_sql(f"PRAGMA busy_timeout = {LOCK_TIMEOUT_MS}")
+            conn.commit()
+        try:
+            with conn.begin():
+                try:
+                    conn.execute(
+                        schema_migrations.insert().values(
+                            version=version, name=name, applied_at=datetime.datetime.utcnow()
+                        )
+                    )
+                except IntegrityError:
+                    raise AlreadyApplied(name)
+                step(conn)
+        finally:
+            if conn.dialect.name == "sqlite":
+                conn.exec_driver_sql(f"PRAGMA busy_timeout = {busy_timeout}")
+                conn.commit()
+
+
+def pending_versions(engine: Engine) -> List[int]:
+    """Versions not yet recorded in schema_migrations, read without DDL or the write lock."""
+    with engine.connect() as conn:
+        if not inspect(conn).has_table(schema_migrations.name):
+            return [version for version, _, _ in MIGRATIONS]
+        done = set(conn.execute(select(schema_migrations.c.version)).scalars())
+    return [version for version, _, _ in MIGRATIONS if version not in done]
+
+
+def upgrade(engine: Engine, read_engine: Optional[Engine] = None) -> List[str]:
+    """
+    Apply every pending migration in version order, each in its own transaction.
+
+    Safe to run from several processes at once; each step is applied by exactly one of them.
+    Whether anything is pending is checked on read_engine (engine by default) first, so booting
+    a worker against a current schema runs no DDL and takes no connection from engine.
+    Returns the names of the migrations that this call applied.
+    """
+    # 起動のたびに書き込み用の接続で CREATE TABLE IF NOT EXISTS を実行しないよう、先に読み込みだけで確認する
+    if not pending_versions(read_engine or engine):
+        return []
+    done = set(applied_versions(engine))
+    applied = []
+    for version, name, step in MIGRATIONS:
+        if version in done:
+            continue
+        try:
+            apply(engine, version, name, step)
+        except AlreadyApplied:
+            continue
+        applied.append(name)
+    return applied
@@ -0,0 +1,134 @@
+# app/db/pool_metrics.py
+# コネクションプールの計測（チェックアウト数・待ち時間・オーバーフロー・使用中の接続数）
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+
+class PoolMetrics:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.connects = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.invalidations = 0
+        self.timeouts = 0
+        self.in_use = 0
+        self.in_use_max = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def record_wait(self, wait: float, timed_out: bool) -> None:
+        with self._lock:
+            self.wait_total += wait
+            self.wait_max = max(self.wait_max, wait)
+            if timed_out:
+                self.timeouts += 1
+
+    def connect(self) -> None:
+        with self._lock:
+            self.connects += 1
+
+    def checkout(self) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.in_use += 1
+            self.in_use_max = max(self.in_use_max, self.in_use)
+
+    def checkin(self) -> None:
+        with self._lock:
+            self.checkins += 1
+            self.in_use = max(self.in_use - 1, 0)
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self.invalidations += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            checkouts = self.checkouts or 1
+            return {
+                "connects": self.connects,
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "invalidations": self.invalidations,
+                "timeouts": self.timeouts,
+                "in_use": self.in_use,
+                "in_use_max": self.in_use_max,
+                "wait_avg_ms": self.wait_total / checkouts * 1000,
+                "wait_max_ms": self.wait_max * 1000,
+            }
+
+
+# プール名（pool_logging_name）ごとの計測値と対象エンジン
+_metrics: Dict[str, PoolMetrics] = {}
+_engines: Dict[str, Engine] = {}
+
+
+def get_metrics(name: str) -> PoolMetrics:
+    return _metrics.setdefault(name, PoolMetrics())
+
+
+class _TimedGetMixin:
+    """Times how long checkouts wait for a free connection (including pool timeouts)."""
+
+    def _do_get(self):  # type: ignore[no-untyped-def]
+        name: Optional[str] = self._orig_logging_name  # type: ignore[attr-defined]
+        start = time.perf_counter()
+        timed_out = False
+        try:
+            return super()._do_get()  # type: ignore[misc]
+        except exc.TimeoutError:
+            timed_out = True
+            raise
+        finally:
+            if name:
+                get_metrics(name).record_wait(time.perf_counter() - start, timed_out)
+
+
+class TimedQueuePool(_TimedGetMixin, QueuePool):
+    pass
+
+
+class TimedAsyncAdaptedQueuePool(_TimedGetMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def instrument(engine: Engine, name: str) -> None:
+    """Attach pool event listeners; engine must be created with pool_logging_name=name."""
+    metrics = get_metrics(name)
+    _engines[name] = engine
+
+    @event.listens_for(engine, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        metrics.connect()
+
+    @event.listens_for(engine, "checkout")
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        metrics.checkout()
+
+    @event.listens_for(engine, "checkin")
+    def on_checkin(dbapi_connection, connection_record):
+        metrics.checkin()
+
+    @event.listens_for(engine, "invalidate")
+    def on_invalidate(dbapi_connection, connection_record, exception):
+        metrics.invalidate()
+
+
+def snapshot() -> Dict[str, Dict[str, Any]]:
+    """Counters plus the live pool status of every instrumented engine."""
+    result = {}
+    for name, engine in _engines.items():
+        pool = engine.pool
+        stats = get_metrics(name).stats()
+        if isinstance(pool, QueuePool):
+            stats.update(
+                {"size": pool.size(), "checked_out": pool.checkedout(), "overflow": max(pool.overflow(), 0)}
+            )
+        result[name] = stats
+    return result
@@ -0,0 +1,121 @@
+# app/db/query_plans.py
+# ホットパスのクエリが全件スキャンに退行していないかを EXPLAIN QUERY PLAN で確認する（SQLite のみ）
+# python -m app.cli check-plans
+import datetime
+import re
+from typing import Any, Callable, Dict, List, Tuple
+
+from fastapi import Response
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.api.api_v1.endpoints import stats as stats_endpoints
+from app.api.api_v1.endpoints import tasks as tasks_endpoints
+from app.api.api_v1.endpoints import timeline as timeline_endpoints
+from app.api.pagination import encode_cursor
+from app.models.task_like import TaskLike
+from app.services import changes as changes_service
+from app.services import feed, follow_graph
+from app.services import likes as likes_service
+from app.services import search as search_service
+from app.services import timeline as timeline_service
+
+# "SCAN task" はテーブル全体の走査（インデックスを使う走査は "SCAN task USING INDEX ..." になる）
+FULL_SCAN = re.compile(r"^SCAN (TABLE )?(?P<table>\w+)( AS \w+)?$")
+# 件数が少ないことが前提で、全件読むのが想定どおりのテーブル（pulled な作成者）
+SMALL_TABLES = {"pulledauthor"}
+
+SAMPLE_USER_ID = 1
+SAMPLE_TASK_ID = 1
+
+
+def _cursor() -> str:
+    return encode_cursor(datetime.datetime.utcnow(), 2**31 - 1)
+
+
+# エンドポイントと同じ関数（またはエンドポイント内のクエリそのもの）を実行し、発行された SQL を調べる
+HOT_PATHS: Dict[str, Callable[[Session], Any]] = {
+    "timeline": lambda db: timeline_endpoints.read_home_timeline(
+        db, Response(), SAMPLE_USER_ID, skip=0, limit=20, cursor=None
+    ),
+    "timeline_cursor": lambda db: timeline_endpoints.read_home_timeline(
+        db, Response(), SAMPLE_USER_ID, skip=0, limit=20, cursor=_cursor()
+    ),
+    "explore": lambda db: timeline_endpoints.read_public_tasks(
+        db, Response(), SAMPLE_USER_ID, skip=0, limit=20, cursor=None
+    ),
+    "explore_cursor": lambda db: timeline_endpoints.read_public_tasks(
+        db, Response(), SAMPLE_USER_ID, skip=0, limit=20, cursor=_cursor()
+    ),
+    "own_tasks": lambda db: tasks_endpoints.read_own_tasks(
+        db, Response(), SAMPLE_USER_ID, skip=0, limit=20, cursor=None
+    ),
+    "own_tasks_cursor": lambda db: tasks_endpoints.read_own_tasks(
+        db, Response(), SAMPLE_USER_ID, skip=0, limit=20, cursor=_cursor()
+    ),
+    "own_tasks_open_by_due_date": lambda db: tasks_endpoints.read_own_tasks(
+        db, Response(), SAMPLE_USER_ID, skip=0, limit=20, cursor=None, completed=False, sort="due_date"
+    ),
+    "liked_by_me": lambda db: feed.get_liked_task_ids(db, SAMPLE_USER_ID, [SAMPLE_TASK_ID, SAMPLE_TASK_ID + 1]),
+    "like_exists": lambda db: db.query(TaskLike)
+    .filter(TaskLike.task_id == SAMPLE_TASK_ID, TaskLike.user_id == SAMPLE_USER_ID)
+    .first(),
+    "likes_lookup": lambda db: likes_service.get_like_summaries(
+        db, SAMPLE_USER_ID, [SAMPLE_TASK_ID, SAMPLE_TASK_ID + 1]
+    ),
+    "likers": lambda db: likes_service.get_likers(
+        db, SAMPLE_TASK_ID, skip=0, limit=100, cursor=None, with_users=True
+    ),
+    "likers_cursor": lambda db: likes_service.get_likers(
+        db, SAMPLE_TASK_ID, skip=0, limit=100, cursor=_cursor(), with_users=True
+    ),
+    # フォロー関係の全件読み込みはワーカーごとに1回だけなので対象外（以降はバージョン確認と差分の取り込み）
+    "follow_graph_version": lambda db: follow_graph.read_version(db),
+    "follow_graph_changes": lambda db: follow_graph.read_follow_changes(db, 0),
+    "search": lambda db: search_service.search_tasks(db, SAMPLE_USER_ID, "sample task", skip=0, limit=20),
+    "user_version": lambda db: changes_service.user_version(db, SAMPLE_USER_ID),
+    "timeline_version": lambda db: timeline_service.get_home_version(
+        db, SAMPLE_USER_ID, skip=0, limit=20, cursor=None
+    ),
+    "timeline_version_cursor": lambda db: timeline_service.get_home_version(
+        db, SAMPLE_USER_ID, skip=0, limit=20, cursor=_cursor()
+    ),
+    "stats_overview": lambda db: stats_endpoints.compute_overall_stats(db, SAMPLE_USER_ID, 30),
+    "stats_streak": lambda db: stats_endpoints.get_streak_info(db, SAMPLE_USER_ID),
+}
+
+
+def capture_statements(db: Session, fn: Callable[[Session], Any]) -> List[Tuple[str, Any]]:
+    statements: List[Tuple[str, Any]] = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    engine = db.get_bind()
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        fn(db)
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    return statements
+
+
+def full_scans(db: Session, statement: str, parameters: Any) -> List[str]:
+    rows = db.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).all()
+    scans = [(row[-1], FULL_SCAN.match(row[-1])) for row in rows]
+    return [detail for detail, scan in scans if scan and scan.group("table") not in SMALL_TABLES]
+
+
+def check_plans(db: Session) -> Dict[str, List[Tuple[str, str]]]:
+    """
+    Run every hot path and EXPLAIN each statement it issued.
+
+    Returns {path: [(statement, plan detail), ...]} for statements that scan a whole table;
+    an empty dict means every hot query is index-backed.
+    """
+    failures: Dict[str, List[Tuple[str, str]]] = {}
+    for name, fn in HOT_PATHS.items():
+        for statement, parameters in capture_statements(db, fn):
+            for detail in full_scans(db, statement, parameters):
+                failures.setdefault(name, []).append((statement, detail))
+    return failures
@@ -1,15 +1,43 @@
 # app/main.py
-import uvicorn  # if __name__ == "__main__" 内から移動
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from starlette.concurrency import run_in_threadpool
 
 from app.api.api_v1.api import api_router  # ルーターを含めるコメント後から移動
+from app.api.pagination import NEXT_CURSOR_HEADER
+from app.core import hashing
 from app.core.config import settings
-from app.db.base import Base  # 26行目から移動
-from app.db.session import engine  # データベース依存関係のコメント後から移動
+from app.db import session
+from app.services import follow_graph, like_buffer
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if settings.DB_MIGRATE_ON_STARTUP:
+        # データベーススキーマの作成・移行（最新なら読み込み用の接続で確認するだけで、書き込みも DDL もしない）
+        # 本番では False にして、デプロイ時に python -m app.cli migrate を1回だけ実行する
+        from app.db import migrations
+
+        await run_in_threadpool(migrations.upgrade, session.get_engine(), session.get_read_engine())
+    # フォローグラフを読み込み専用の接続で読み込んでおく（最初の書き込みトランザクション内で読み込まないように）
+    await run_in_threadpool(follow_graph.warm)
+    hashing.start()
+    yield
+    # 書き込み遅延中のいいねをエンジンを閉じる前に書き込む
+    like_buffer.shutdown()
+    hashing.shutdown()
+    session.dispose_engines()
+    await session.dispose_async_engine()
+
 
 app = FastAPI(
-    title="WhatToDo API", description="API for WhatToDo - Task Management and Social Sharing App", version="0.1.0"
+    title="WhatToDo API",
+    description="API for WhatToDo - Task Management and Social Sharing App",
+    version="0.1.0",
+    lifespan=lifespan,
 )
 
 # CORS設定を追加
@@ -19,6 +47,11 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, "ETag"],
+)
+# タイムラインやタスク一覧など大きなリストのレスポンスを圧縮
+app.add_middleware(
+    GZipMiddleware, minimum_size=settings.GZIP_MINIMUM_SIZE, compresslevel=settings.GZIP_COMPRESS_LEVEL
 )
 
 
@@ -27,11 +60,11 @@ def read_root():
     return {"message": "Welcome to WhatToDo API"}
 
 
-# データベーステーブルの作成
-Base.metadata.create_all(bind=engine)
-
 # ルーターを含める
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
 if __name__ == "__main__":
+    # uvicorn はワーカーの起動時には不要なので、直接実行する場合だけ読み込む
+    import uvicorn
+
     uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True)
@@ -0,0 +1,10 @@
+# app/models/cache_version.py
+from sqlalchemy import Column, Integer, String
+
+from app.db.base_class import Base
+
+
+# プロセス内キャッシュの無効化用カウンター（キャッシュごとに1行。元データと同じトランザクションで増やす）
+class CacheVersion(Base):
+    name = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
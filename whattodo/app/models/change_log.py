@@ -0,0 +1,25 @@
+# app/models/change_log.py
+import datetime
+
+from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Index, Integer, String
+
+from app.db.base_class import Base
+
+
+# 差分同期（GET /sync）用の変更履歴。キーごとに最新の1行だけを残すので、行数はおおよそ現存データ＋削除済みの数になる
+class ChangeLog(Base):
+    __table_args__ = (
+        Index("uq_changelog_user_id_entity_key", "user_id", "entity", "entity_id", "related_id", unique=True),
+        Index("ix_changelog_user_id_seq", "user_id", "seq"),
+        # seq を再利用しない（削除された最大値より必ず大きくなる）
+        {"sqlite_autoincrement": True},
+    )
+
+    seq = Column(Integer, primary_key=True)  # 単調増加の変更番号（クライアントのウォーターマーク）
+    user_id = Column(Integer, ForeignKey("user.id"), nullable=False)  # この変更を受け取るユーザー
+    entity = Column(String, nullable=False)  # "task" / "like" / "follow"
+    # task: (task_id, 0) / like: (task_id, いいねしたユーザー) / follow: (follower_id, followed_id)
+    entity_id = Column(Integer, nullable=False)
+    related_id = Column(Integer, nullable=False, default=0)
+    deleted = Column(Boolean, nullable=False, default=False)  # True は削除（トゥームストーン）
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
@@ -0,0 +1,13 @@
+# app/models/daily_task_stats.py
+from sqlalchemy import Column, Date, ForeignKey, Integer
+
+from app.db.base_class import Base
+
+
+# ユーザー・日ごとのタスク集計（タスクの作成・更新・削除時に差分で更新される）
+class DailyTaskStats(Base):
+    user_id = Column(Integer, ForeignKey("user.id"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    created_count = Column(Integer, default=0, nullable=False)  # この日に作成されたタスク
+    completed_count = Column(Integer, default=0, nullable=False)  # この日に完了した（updated_at）タスク
+    closed_count = Column(Integer, default=0, nullable=False)  # オープン期間がこの日で終わるタスク（期限日）
@@ -6,6 +6,7 @@ from sqlalchemy import (  # Enum,
     Column,
     DateTime,
     ForeignKey,
+    Index,
     Integer,
     String,
     Text,
@@ -22,6 +23,17 @@ class PrivacyLevel(enum.Enum):
 
 
 class Task(Base):
+    __table_args__ = (
+        # キーセットページネーション用: (created_at, id) の範囲スキャン（id は rowid として末尾に含まれる）
+        Index("ix_task_owner_id_created_at", "owner_id", "created_at"),
+        Index("ix_task_privacy_level_created_at", "privacy_level", "created_at"),
+        Index("ix_task_owner_id_is_completed_updated_at", "owner_id", "is_completed", "updated_at"),
+        # タスク一覧の並び替え（due_date / updated_at）と完了状態での絞り込み
+        Index("ix_task_owner_id_due_date", "owner_id", "due_date"),
+        Index("ix_task_owner_id_updated_at", "owner_id", "updated_at"),
+        Index("ix_task_owner_id_is_completed_due_date", "owner_id", "is_completed", "due_date"),
+    )
+
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, index=True)
     description = Column(Text, nullable=True)
@@ -30,6 +42,8 @@ class Task(Base):
     privacy_level = Column(String, default="followers")  # EnumTypeはSQLiteでは直接サポートされていないので単純化
     created_at = Column(DateTime, default=datetime.datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)
+    # TaskLike の件数（like/unlike と同じトランザクションで更新、app.cli reconcile-likes で補正）
+    likes_count = Column(Integer, default=0, server_default="0", nullable=False)
 
     owner_id = Column(Integer, ForeignKey("user.id"))
     owner = relationship("User", back_populates="tasks")
@@ -1,13 +1,20 @@
 # app/models/task_like.py
 import datetime
 
-from sqlalchemy import Column, DateTime, ForeignKey, Integer
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer
 from sqlalchemy.orm import relationship
 
 from app.db.base_class import Base
 
 
 class TaskLike(Base):
+    __table_args__ = (
+        # 同じユーザーは1タスクに1回だけいいねできる（task_id での検索にも使う）
+        Index("uq_tasklike_task_id_user_id", "task_id", "user_id", unique=True),
+        # いいねしたユーザー一覧（新しい順のキーセットページング）
+        Index("ix_tasklike_task_id_created_at", "task_id", "created_at"),
+    )
+
     id = Column(Integer, primary_key=True, index=True)
     task_id = Column(Integer, ForeignKey("task.id"))
     user_id = Column(Integer, ForeignKey("user.id"))
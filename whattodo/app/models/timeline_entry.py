@@ -0,0 +1,25 @@
+# app/models/timeline_entry.py
+import datetime
+
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer
+
+from app.db.base_class import Base
+
+
+# ホームタイムラインの受信箱（fan-out-on-write で作成される）
+class TimelineEntry(Base):
+    __table_args__ = (
+        Index("ix_timelineentry_user_id_created_at", "user_id", "created_at", "task_id"),
+        Index("ix_timelineentry_user_id_owner_id", "user_id", "owner_id"),
+    )
+
+    user_id = Column(Integer, ForeignKey("user.id"), primary_key=True)  # 受信箱の持ち主
+    task_id = Column(Integer, ForeignKey("task.id"), primary_key=True, index=True)
+    owner_id = Column(Integer, ForeignKey("user.id"))  # タスクの作成者
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)  # タスクの created_at のコピー
+
+
+# フォロワーが多すぎるため fan-out せず、読み込み時に取得するユーザー
+class PulledAuthor(Base):
+    user_id = Column(Integer, ForeignKey("user.id"), primary_key=True)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
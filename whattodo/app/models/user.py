@@ -1,12 +1,14 @@
 import datetime
 
-from sqlalchemy import Boolean, Column, DateTime, Integer, String
+from sqlalchemy import Boolean, Column, DateTime, Index, Integer, String
 from sqlalchemy.orm import relationship
 
 from app.db.base_class import Base
 
 
 class User(Base):
+    __table_args__ = (Index("ix_user_created_at", "created_at"),)
+
     id = Column(Integer, primary_key=True, index=True)
     email = Column(String, unique=True, index=True)
     username = Column(String, unique=True, index=True)
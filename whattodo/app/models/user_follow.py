@@ -9,7 +9,7 @@ from app.db.base_class import Base
 
 class UserFollow(Base):
     follower_id = Column(Integer, ForeignKey("user.id"), primary_key=True)
-    followed_id = Column(Integer, ForeignKey("user.id"), primary_key=True)
+    followed_id = Column(Integer, ForeignKey("user.id"), primary_key=True, index=True)
     created_at = Column(DateTime, default=datetime.datetime.utcnow)
 
     # リレーションシップ
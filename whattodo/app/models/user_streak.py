@@ -0,0 +1,12 @@
+# app/models/user_streak.py
+from sqlalchemy import Column, Date, ForeignKey, Integer
+
+from app.db.base_class import Base
+
+
+# ユーザーごとのストリーク状態（タスク完了時に差分で更新される）
+class UserStreak(Base):
+    user_id = Column(Integer, ForeignKey("user.id"), primary_key=True)
+    current_run = Column(Integer, default=0, nullable=False)  # last_completed_date で終わる連続日数
+    longest_run = Column(Integer, default=0, nullable=False)
+    last_completed_date = Column(Date, nullable=True)
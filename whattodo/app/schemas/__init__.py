@@ -1,25 +1,50 @@
 # app/schemas/__init__.py
 from app.schemas.stats import DailyStats, OverallStats, PeriodStats, StreakInfo
-from app.schemas.task import Task, TaskCreate, TaskUpdate
-from app.schemas.task_like import TaskLike, TaskLikeCreate
+from app.schemas.sync import FollowChange, LikeChange, SyncResponse
+from app.schemas.task import (
+    Task,
+    TaskBatch,
+    TaskBatchCreate,
+    TaskBatchDelete,
+    TaskBatchOperation,
+    TaskBatchResult,
+    TaskBatchUpdate,
+    TaskCreate,
+    TaskListItem,
+    TaskUpdate,
+)
+from app.schemas.task_like import TaskLike, TaskLikeCreate, TaskLikeLookup, TaskLikeSummary
 from app.schemas.timeline import TimelineItem
 from app.schemas.token import Token, TokenPayload
-from app.schemas.user import User, UserCreate, UserUpdate
+from app.schemas.user import User, UserCreate, UserSummary, UserUpdate
 
 __all__ = [
     "User",
     "UserCreate",
     "UserUpdate",
+    "UserSummary",
     "Task",
     "TaskCreate",
     "TaskUpdate",
+    "TaskListItem",
+    "TaskBatch",
+    "TaskBatchCreate",
+    "TaskBatchUpdate",
+    "TaskBatchDelete",
+    "TaskBatchOperation",
+    "TaskBatchResult",
     "Token",
     "TokenPayload",
     "TaskLike",
     "TaskLikeCreate",
+    "TaskLikeLookup",
+    "TaskLikeSummary",
     "TimelineItem",
     "DailyStats",
     "PeriodStats",
     "StreakInfo",
     "OverallStats",
+    "SyncResponse",
+    "LikeChange",
+    "FollowChange",
 ]
@@ -0,0 +1,30 @@
+# app/schemas/sync.py
+from typing import List
+
+from pydantic import BaseModel
+
+from app.schemas.task import Task
+
+
+# いいねの変更（deleted=True は取り消し）
+class LikeChange(BaseModel):
+    task_id: int
+    user_id: int
+    deleted: bool
+
+
+# フォローの変更（deleted=True はフォロー解除）
+class FollowChange(BaseModel):
+    follower_id: int
+    followed_id: int
+    deleted: bool
+
+
+# 差分同期レスポンス: 次回は watermark を since に渡す（has_more が True ならすぐに続きを取得する）
+class SyncResponse(BaseModel):
+    watermark: int
+    has_more: bool
+    tasks: List[Task]
+    deleted_task_ids: List[int]
+    likes: List[LikeChange]
+    follows: List[FollowChange]
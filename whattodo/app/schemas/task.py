@@ -1,8 +1,8 @@
 # app/schemas/task.py
 from datetime import datetime
-from typing import Optional
+from typing import Annotated, List, Literal, Optional, Union
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 # タスク基本スキーマ
@@ -42,3 +42,54 @@ class TaskInDBBase(TaskBase):
 # APIレスポンス用タスク
 class Task(TaskInDBBase):
     pass
+
+
+# 一覧用タスク（fields= で選ばれた項目だけを返すので、すべて省略可能）
+class TaskListItem(BaseModel):
+    id: Optional[int] = None
+    title: Optional[str] = None
+    description: Optional[str] = None
+    is_completed: Optional[bool] = None
+    due_date: Optional[datetime] = None
+    privacy_level: Optional[str] = None
+    owner_id: Optional[int] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+# 一括操作リクエスト（op で作成・更新・削除を区別）
+class TaskBatchCreate(BaseModel):
+    op: Literal["create"]
+    task: TaskCreate
+
+
+class TaskBatchUpdate(BaseModel):
+    op: Literal["update"]
+    id: int
+    task: TaskUpdate
+
+
+class TaskBatchDelete(BaseModel):
+    op: Literal["delete"]
+    id: int
+
+
+TaskBatchOperation = Annotated[Union[TaskBatchCreate, TaskBatchUpdate, TaskBatchDelete], Field(discriminator="op")]
+
+
+class TaskBatch(BaseModel):
+    operations: List[TaskBatchOperation] = Field(min_length=1)
+    # True: 1件でも失敗があれば何も適用しない / False: 失敗した操作だけを飛ばして残りを適用する
+    atomic: bool = True
+
+
+# 一括操作の操作ごとの結果（status は単体エンドポイントと同じ HTTP ステータス）
+class TaskBatchResult(BaseModel):
+    index: int
+    op: str
+    status: int
+    task: Optional[Task] = None
+    detail: Optional[str] = None
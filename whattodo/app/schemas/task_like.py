@@ -1,8 +1,8 @@
 # app/schemas/task_like.py
 from datetime import datetime
-from typing import Optional  # noqa: F401
+from typing import List, Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 # いいね基本スキーマ
@@ -28,3 +28,17 @@ class TaskLikeInDBBase(TaskLikeBase):
 # APIレスポンス用いいね
 class TaskLike(TaskLikeInDBBase):
     pass
+
+
+# いいね数と自分のいいねの一括取得リクエスト
+class TaskLikeLookup(BaseModel):
+    task_ids: List[int] = Field(min_length=1)
+
+
+# 一括取得のタスクごとの結果（status は GET /tasks/{id}/likes と同じ HTTP ステータス）
+class TaskLikeSummary(BaseModel):
+    task_id: int
+    status: int
+    likes_count: Optional[int] = None
+    liked_by_me: Optional[bool] = None
+    detail: Optional[str] = None
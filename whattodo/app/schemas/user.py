@@ -37,3 +37,9 @@ class UserInDBBase(UserBase):
 # APIレスポンス用ユーザー
 class User(UserInDBBase):
     pass
+
+
+# いいねしたユーザー一覧などに使う軽量なユーザー情報
+class UserSummary(BaseModel):
+    id: int
+    username: Optional[str] = None
@@ -0,0 +1,147 @@
+# app/services/changes.py
+# 差分同期用の変更履歴（タスク・いいね・フォローの変更を関係するユーザーごとに記録）
+import datetime
+from typing import Any, Iterable, List, Sequence, Tuple
+
+from sqlalchemy import delete, func, literal, select, true, tuple_
+from sqlalchemy.orm import Session
+
+from app.db.dialect import insert
+from app.models.change_log import ChangeLog
+from app.models.task import Task
+from app.models.task_like import TaskLike
+from app.models.user_follow import UserFollow
+
+TASK, LIKE, FOLLOW = "task", "like", "follow"
+
+# PostgreSQL のアドバイザリーロックのキー（変更履歴への書き込みを直列化する）
+CHANGE_LOG_LOCK_KEY = 0x6368616E6765  # "change"
+
+
+def record_changes(db: Session, user_id: int, entity: str, keys: Sequence[Tuple[int, int]], *, deleted: bool) -> None:
+    """
+    Record that entities changed for user_id; keys are (entity_id, related_id) pairs.
+
+    The previous row for the same key is replaced, so every key keeps only its latest
+    change under a new, higher seq.
+    """
+    replace_changes(db, [(user_id, entity, entity_id, related_id) for entity_id, related_id in keys], deleted=deleted)
+
+
+def replace_changes(db: Session, rows: Sequence[Tuple[int, str, int, int]], *, deleted: bool) -> None:
+    """record_changes for (user_id, entity, entity_id, related_id) rows of any users, in two statements."""
+    if not rows:
+        return
+    lock_change_log(db)
+    db.execute(
+        delete(ChangeLog).where(
+            tuple_(ChangeLog.user_id, ChangeLog.entity, ChangeLog.entity_id, ChangeLog.related_id).in_(list(rows))
+        )
+    )
+    now = datetime.datetime.utcnow()
+    db.execute(
+        insert(db, ChangeLog),
+        [
+            {
+                "user_id": user_id,
+                "entity": entity,
+                "entity_id": entity_id,
+                "related_id": related_id,
+                "deleted": deleted,
+                "created_at": now,
+            }
+            for user_id, entity, entity_id, related_id in rows
+        ],
+    )
+
+
+def lock_change_log(db: Session) -> None:
+    """
+    Make seq order match commit order, which read_changes' watermark relies on.
+
+    SQLite has a single writer, so this holds already. On PostgreSQL, transactions draw seqs from a
+    sequence and can commit out of order. A client that already synced past a later seq would then
+    never see the earlier one. A transaction-level advisory lock, held until commit, serializes
+    change-log writers there.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        db.execute(select(func.pg_advisory_xact_lock(CHANGE_LOG_LOCK_KEY)))
+
+
+def record_task_changes(db: Session, owner_id: int, task_ids: Iterable[int], *, deleted: bool = False) -> None:
+    record_changes(db, owner_id, TASK, [(task_id, 0) for task_id in task_ids], deleted=deleted)
+
+
+def record_like_change(db: Session, task_id: int, user_id: int, owner_id: int, *, deleted: bool = False) -> None:
+    record_like_changes(db, [(task_id, user_id, owner_id)], deleted=deleted)
+
+
+def record_like_changes(db: Session, likes: Iterable[Tuple[int, int, int]], *, deleted: bool = False) -> None:
+    """Record (task_id, user_id, owner_id) likes of any users at once."""
+    # いいねした本人とタスクの作成者の両方に届ける
+    rows = [
+        (recipient_id, LIKE, task_id, user_id)
+        for task_id, user_id, owner_id in likes
+        for recipient_id in {user_id, owner_id}
+    ]
+    replace_changes(db, rows, deleted=deleted)
+
+
+def record_follow_change(db: Session, follower_id: int, followed_id: int, *, deleted: bool = False) -> None:
+    for recipient_id in (follower_id, followed_id):
+        record_changes(db, recipient_id, FOLLOW, [(follower_id, followed_id)], deleted=deleted)
+
+
+def read_changes(db: Session, user_id: int, since: int, limit: int) -> Tuple[List[ChangeLog], bool]:
+    """
+    The user's changes with seq > since in seq order, and whether more remain.
+
+    since is a watermark: this is only correct because lock_change_log makes seqs commit in order.
+    """
+    rows = (
+        db.query(ChangeLog)
+        .filter(ChangeLog.user_id == user_id, ChangeLog.seq > since)
+        .order_by(ChangeLog.seq)
+        .limit(limit + 1)
+        .all()
+    )
+    return rows[:limit], len(rows) > limit
+
+
+def user_version(db: Session, user_id: int) -> int:
+    """
+    The user's latest seq (0 before any change).
+
+    It grows whenever the user's tasks, likes on or by them, or their follows change, so it
+    validates anything built from those alone, such as their task list and stats.
+    """
+    return db.query(func.max(ChangeLog.seq)).filter(ChangeLog.user_id == user_id).scalar() or 0
+
+
+def latest_seq(user_id_column: Any) -> Any:
+    """
+    Correlated max(seq) of the user in user_id_column, for use inside a query over that column.
+
+    Each outer row costs one index lookup, however many changes the user has.
+    """
+    return select(func.max(ChangeLog.seq)).where(ChangeLog.user_id == user_id_column).scalar_subquery()
+
+
+def backfill_changes(db: Session) -> None:
+    """Record the current tasks, likes and follows as changes (for data that predates the log)."""
+    now, live = literal(datetime.datetime.utcnow()), literal(False)
+    columns = ["user_id", "entity", "entity_id", "related_id", "deleted", "created_at"]
+    like = TaskLike.task_id.isnot(None) & TaskLike.user_id.isnot(None)
+    sources = [
+        select(Task.owner_id, literal(TASK), Task.id, literal(0), live, now).where(Task.owner_id.isnot(None)),
+        select(TaskLike.user_id, literal(LIKE), TaskLike.task_id, TaskLike.user_id, live, now).where(like),
+        select(Task.owner_id, literal(LIKE), TaskLike.task_id, TaskLike.user_id, live, now)
+        .join(Task, Task.id == TaskLike.task_id)
+        .where(like),
+        select(UserFollow.follower_id, literal(FOLLOW), UserFollow.follower_id, UserFollow.followed_id, live, now),
+        select(UserFollow.followed_id, literal(FOLLOW), UserFollow.follower_id, UserFollow.followed_id, live, now),
+    ]
+    for source in sources:
+        # SQLite は INSERT ... SELECT ... FROM t ON CONFLICT の ON を結合条件と解釈するので WHERE を必ず付ける
+        source = source.where(true()) if source.whereclause is None else source
+        db.execute(insert(db, ChangeLog).from_select(columns, source).on_conflict_do_nothing())
@@ -0,0 +1,59 @@
+# app/services/feed.py
+from typing import Any, Dict, List, Sequence, Set
+
+from sqlalchemy.orm import Session
+
+from app.models.task import Task
+from app.models.task_like import TaskLike
+from app.models.user import User
+from app.services import like_buffer
+
+
+def get_liked_task_ids(db: Session, user_id: int, task_ids: Sequence[int]) -> Set[int]:
+    """IDs among task_ids that user_id has liked, in one query."""
+    if not task_ids:
+        return set()
+    rows = db.query(TaskLike.task_id).filter(TaskLike.user_id == user_id, TaskLike.task_id.in_(task_ids)).all()
+    return {row[0] for row in rows}
+
+
+def user_item(user: User) -> Dict[str, Any]:
+    # schemas.User と同じ項目
+    return {
+        "email": user.email,
+        "username": user.username,
+        "is_active": user.is_active,
+        "id": user.id,
+        "created_at": user.created_at,
+    }
+
+
+def hydrate_timeline_items(db: Session, tasks: List[Task], viewer_id: int) -> List[Dict[str, Any]]:
+    """
+    A page of tasks as plain TimelineItem dicts, with likes_count and liked_by_me attached.
+
+    likes_count is the denormalized column, so only the liked set costs a query. The dicts hold
+    exactly the schema's fields, so endpoints can render them without re-validating.
+    """
+    liked_ids = get_liked_task_ids(db, viewer_id, [task.id for task in tasks])
+    likes = like_buffer.overlay_likes(viewer_id, {task.id: (task.likes_count, task.id in liked_ids) for task in tasks})
+    # 同じ作成者のタスクが続くページでは作成者の辞書を使い回す
+    owners = {task.owner_id: user_item(task.owner) for task in tasks}
+
+    return [
+        {
+            "id": task.id,
+            "title": task.title,
+            "description": task.description,
+            "is_completed": task.is_completed,
+            "due_date": task.due_date,
+            "privacy_level": task.privacy_level,
+            "created_at": task.created_at,
+            "updated_at": task.updated_at,
+            "owner_id": task.owner_id,
+            "owner": owners[task.owner_id],
+            "likes_count": likes[task.id][0],
+            "liked_by_me": likes[task.id][1],
+        }
+        for task in tasks
+    ]
@@ -0,0 +1,231 @@
+# app/services/follow_graph.py
+# フォロー関係のプロセス内キャッシュ（ユーザーごとにソート済みの int 配列を フォロー中・フォロワー の2方向で持つ）
+# 他のワーカーでの変更は cacheversion の follow_graph 行で検知し、変更履歴（seq 順）から差分だけを取り込む
+# 書き込みトランザクション内（fan-out など）では peek を使い、書き込みロックを持ったまま読み込まないこと
+# フォロー・フォロー解除以外の経路（SQL の直接実行など）で userfollow を変えた場合はワーカーを再起動すること
+import threading
+from array import array
+from bisect import bisect_left
+from collections import defaultdict
+from itertools import groupby
+from operator import itemgetter
+from typing import Any, Dict, List, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.db.dialect import insert
+from app.db.session import ReadSessionLocal
+from app.models.cache_version import CacheVersion
+from app.models.change_log import ChangeLog
+from app.models.user_follow import UserFollow
+from app.services import changes as changes_service
+
+VERSION_NAME = "follow_graph"
+
+# ユーザー ID は 32 ビットに収まる前提（1辺あたり 4 バイト × 2方向）
+TYPECODE = "i"
+
+EMPTY = array(TYPECODE)
+
+LOAD_BATCH_SIZE = 10000
+
+
+def _with(ids: array, user_id: int) -> array:
+    index = bisect_left(ids, user_id)
+    if index < len(ids) and ids[index] == user_id:
+        return ids
+    return ids[:index] + array(TYPECODE, [user_id]) + ids[index:]
+
+
+def _without(ids: array, user_id: int) -> array:
+    index = bisect_left(ids, user_id)
+    if index == len(ids) or ids[index] != user_id:
+        return ids
+    return ids[:index] + ids[index + 1 :]
+
+
+class FollowGraph:
+    """
+    Who follows whom, as sorted int arrays per user in both directions.
+
+    Arrays are never modified in place: an update swaps in a new array, so callers may keep
+    and iterate the arrays they got without locking.
+    """
+
+    def __init__(self) -> None:
+        self._following: Dict[int, array] = {}
+        self._followers: Dict[int, array] = {}
+        # 取り込み済みの cacheversion（-1 は未読み込み）と変更履歴の seq
+        self.version = -1
+        self.seq = 0
+        self._lock = threading.Lock()
+        self.loads = 0
+        self.catch_ups = 0
+        self.local_updates = 0
+
+    @property
+    def loaded(self) -> bool:
+        return self.version >= 0
+
+    def following(self, user_id: int) -> array:
+        return self._following.get(user_id, EMPTY)
+
+    def followers(self, user_id: int) -> array:
+        return self._followers.get(user_id, EMPTY)
+
+    def is_following(self, follower_id: int, followed_id: int) -> bool:
+        ids = self.following(follower_id)
+        index = bisect_left(ids, followed_id)
+        return index < len(ids) and ids[index] == followed_id
+
+    def refresh(self, db: Session) -> None:
+        """Bring the graph up to date with the database: one primary key lookup when nothing changed."""
+        version = read_version(db)
+        if version <= self.version:
+            return
+        with self._lock:
+            # 待っている間に他のスレッドが同じか新しいバージョンまで進めていれば何もしない
+            if version <= self.version:
+                return
+            if self.version < 0:
+                self._load(db, version)
+            else:
+                self._catch_up(db, version)
+
+    def apply(self, follower_id: int, followed_id: int, following: bool, version: int) -> None:
+        """
+        Apply this worker's own committed follow or unfollow, made at the given version.
+
+        It is skipped if other changes landed in between; the next refresh replays them all.
+        """
+        with self._lock:
+            if version != self.version + 1:
+                return
+            self._set(follower_id, followed_id, following)
+            self.version = version
+            self.local_updates += 1
+
+    def _set(self, follower_id: int, followed_id: int, following: bool) -> None:
+        update = _with if following else _without
+        for adjacency, user_id, other_id in (
+            (self._following, follower_id, followed_id),
+            (self._followers, followed_id, follower_id),
+        ):
+            ids = update(adjacency.get(user_id, EMPTY), other_id)
+            if ids:
+                adjacency[user_id] = ids
+            else:
+                adjacency.pop(user_id, None)
+
+    def _load(self, db: Session, version: int) -> None:
+        # seq を先に読む: 読み込み中のフォローは全件の読み込みか次の差分のどちらかに必ず含まれる
+        seq = db.query(func.max(ChangeLog.seq)).scalar() or 0
+        # 全件を Python のリストにしないよう、少しずつ読みながら配列に詰める
+        rows = db.execute(
+            select(UserFollow.follower_id, UserFollow.followed_id)
+            .order_by(UserFollow.follower_id, UserFollow.followed_id)
+            .execution_options(yield_per=LOAD_BATCH_SIZE)
+        ).tuples()
+        following: Dict[int, array] = {}
+        followers: Dict[int, array] = defaultdict(lambda: array(TYPECODE))
+        for follower_id, edges in groupby(rows, key=itemgetter(0)):
+            ids = array(TYPECODE, map(itemgetter(1), edges))
+            following[follower_id] = ids
+            # follower_id の昇順に追加するので、フォロワーの配列もソート済みになる
+            for followed_id in ids:
+                followers[followed_id].append(follower_id)
+        self._following = following
+        self._followers = dict(followers)
+        self.version, self.seq = version, seq
+        self.loads += 1
+
+    def _catch_up(self, db: Session, version: int) -> None:
+        # キーごとに最新の状態だけが残っているので、既に反映済みの変更を再適用しても結果は変わらない
+        for seq, follower_id, followed_id, deleted in read_follow_changes(db, self.seq):
+            self._set(follower_id, followed_id, not deleted)
+            self.seq = seq
+        self.version = version
+        self.catch_ups += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            following, followers = dict(self._following), dict(self._followers)
+        arrays = [*following.values(), *followers.values()]
+        return {
+            "version": self.version,
+            "users": len(following.keys() | followers.keys()),
+            "edges": sum(len(ids) for ids in following.values()),
+            "array_bytes": sum(len(ids) * ids.itemsize for ids in arrays),
+            "loads": self.loads,
+            "catch_ups": self.catch_ups,
+            "local_updates": self.local_updates,
+        }
+
+
+def read_version(db: Session) -> int:
+    return db.query(CacheVersion.version).filter(CacheVersion.name == VERSION_NAME).scalar() or 0
+
+
+def read_follow_changes(db: Session, since: int) -> List[Tuple[int, int, int, bool]]:
+    """
+    (seq, follower_id, followed_id, deleted) of follows changed after seq since, in seq order.
+
+    seq order is commit order (see changes.lock_change_log), so since is a safe watermark.
+    """
+    # フォローの変更はフォローした側とされた側の2行ずつ記録されるので、フォローした側の行だけを読む
+    return (
+        db.query(ChangeLog.seq, ChangeLog.entity_id, ChangeLog.related_id, ChangeLog.deleted)
+        .filter(
+            ChangeLog.seq > since,
+            ChangeLog.entity == changes_service.FOLLOW,
+            ChangeLog.user_id == ChangeLog.entity_id,
+        )
+        .order_by(ChangeLog.seq)
+        .all()
+    )
+
+
+def bump_version(db: Session) -> int:
+    """Increment the graph version in the caller's transaction; pass the result to apply_follow after commit."""
+    stmt = insert(db, CacheVersion).values(name=VERSION_NAME, version=1)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[CacheVersion.name], set_={"version": CacheVersion.version + 1}
+    ).returning(CacheVersion.version)
+    return db.execute(stmt).scalar_one()
+
+
+_graph = FollowGraph()
+
+
+def get_graph(db: Session) -> FollowGraph:
+    """This worker's follow graph, refreshed if any worker changed a follow since the last call."""
+    _graph.refresh(db)
+    return _graph
+
+
+def peek() -> FollowGraph:
+    """
+    This worker's follow graph as last refreshed, without reading the database.
+
+    For callers inside a write transaction; it may miss follows other workers made since the last refresh,
+    and is empty until the graph is loaded.
+    """
+    return _graph
+
+
+def warm() -> None:
+    """Load the graph on a read-only session, so that no request (or write transaction) pays for the load."""
+    db = ReadSessionLocal()
+    try:
+        get_graph(db)
+    finally:
+        db.close()
+
+
+def apply_follow(follower_id: int, followed_id: int, following: bool, version: int) -> None:
+    _graph.apply(follower_id, followed_id, following, version)
+
+
+def stats() -> Dict[str, Any]:
+    return _graph.stats()
@@ -0,0 +1,235 @@
+# app/services/like_buffer.py
+# いいね・いいね解除の書き込み遅延（LIKE_WRITE_BEHIND=True のときだけ使う）
+# (タスク, ユーザー) ごとに最後の意図だけをメモリに残し、一定間隔または一定件数ごとに1トランザクションで書き込む。
+# バッファはワーカープロセスごとなので、自分のいいねが即座に読めるのは同じワーカーに届いたリクエストだけ。
+# いいね数（GET /tasks/{id}/likes）には全ユーザーの未書き込みの意図を反映するが、いいねしたユーザーの一覧は
+# ページングがずれないよう書き込み済みの分だけを返す（最大で約1間隔遅れる）。
+# プロセスが異常終了すると未書き込みの意図（最大で約1間隔分）は失われる。正常終了時は lifespan で書き込む
+import threading
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.services import likes as likes_service
+
+# (task_id, user_id)
+Key = Tuple[int, int]
+
+
+class LikeBuffer:
+    def __init__(self, session_factory: Callable[[], Session], *, interval_ms: int, max_events: int) -> None:
+        self._session_factory = session_factory
+        self._interval = interval_ms / 1000
+        self._max_events = max_events
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        # 書き込みは1つずつ（定期書き込みと終了時の書き込みが重ならないように）
+        self._flush_lock = threading.Lock()
+        self._pending: Dict[Key, bool] = {}
+        # 書き込み中の意図（コミットまでは読み込み側に見せ続ける）
+        self._inflight: Dict[Key, bool] = {}
+        self._generation = 0
+        # 未書き込みの意図があるユーザー -> 最後に追加した世代（ETag に使う）
+        self._user_generations: Dict[int, int] = {}
+        self._closed = False
+        self.received = 0
+        self.coalesced = 0
+        self.written = 0
+        self.flushes = 0
+        self.failures = 0
+        self._thread = threading.Thread(target=self._run, name="like-buffer", daemon=True)
+        self._thread.start()
+
+    def add(self, task_id: int, user_id: int, liked: bool) -> None:
+        with self._lock:
+            key = (task_id, user_id)
+            if key in self._pending:
+                self.coalesced += 1
+            self._pending[key] = liked
+            self.received += 1
+            self._generation += 1
+            self._user_generations[user_id] = self._generation
+            if len(self._pending) >= self._max_events:
+                self._wakeup.notify()
+            closed = self._closed
+        if closed:
+            # 終了処理の後に届いた分はその場で書き込む
+            self.flush()
+
+    def overlay(self, user_id: int, task_ids: Iterable[int]) -> Dict[int, bool]:
+        """The user's not yet committed intents for task_ids, as {task_id: liked}."""
+        result = {}
+        with self._lock:
+            for task_id in task_ids:
+                key = (task_id, user_id)
+                if key in self._pending:
+                    result[task_id] = self._pending[key]
+                elif key in self._inflight:
+                    result[task_id] = self._inflight[key]
+        return result
+
+    def task_intents(self, task_id: int) -> Dict[int, bool]:
+        """Every user's not yet committed intent for task_id, as {user_id: liked}."""
+        # バッファは書き込み1回分程度なので、タスク別の索引は持たずに走査する
+        intents = {}
+        with self._lock:
+            # 書き込み中の意図より新しい未書き込みの意図を優先
+            for batch in (self._inflight, self._pending):
+                intents.update({user_id: liked for (other_id, user_id), liked in batch.items() if other_id == task_id})
+        return intents
+
+    def version(self, user_id: int) -> int:
+        """Changes whenever the user adds an intent; 0 once all of their intents are committed."""
+        with self._lock:
+            return self._user_generations.get(user_id, 0)
+
+    def flush(self) -> int:
+        """Write every buffered intent, max_events per transaction; returns how many were written."""
+        written = 0
+        while True:
+            count = self._flush_batch()
+            written += count
+            if count < self._max_events:
+                return written
+
+    def _flush_batch(self) -> int:
+        with self._flush_lock:
+            with self._lock:
+                if len(self._pending) <= self._max_events:
+                    batch, self._pending = self._pending, {}
+                else:
+                    # 1トランザクションの大きさ（文のパラメーター数）を抑える
+                    batch = dict(islice(self._pending.items(), self._max_events))
+                    for key in batch:
+                        del self._pending[key]
+                self._inflight = batch
+            if not batch:
+                return 0
+
+            db = self._session_factory()
+            try:
+                likes_service.apply_like_intents(db, batch)
+                db.commit()
+            except Exception:
+                with self._lock:
+                    # 書き込めなかった意図を戻す（その間に届いた新しい意図を優先）
+                    self._pending = {**batch, **self._pending}
+                    self._inflight = {}
+                    self.failures += 1
+                raise
+            finally:
+                db.close()
+
+            with self._lock:
+                self._inflight = {}
+                self.flushes += 1
+                self.written += len(batch)
+                waiting = {user_id for _, user_id in self._pending}
+                self._user_generations = {
+                    user_id: generation
+                    for user_id, generation in self._user_generations.items()
+                    if user_id in waiting
+                }
+            return len(batch)
+
+    def _run(self) -> None:
+        while True:
+            with self._lock:
+                if not self._closed and len(self._pending) < self._max_events:
+                    self._wakeup.wait(self._interval)
+                if self._closed:
+                    return
+            try:
+                self.flush()
+            except Exception:
+                # 意図は戻してあるので次の間隔で再試行する（failures に計上済み）
+                pass
+
+    def close(self) -> None:
+        """Stop the background flusher and write what is still buffered."""
+        with self._lock:
+            self._closed = True
+            self._wakeup.notify()
+        self._thread.join()
+        self.flush()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "pending": len(self._pending),
+                "received": self.received,
+                "coalesced": self.coalesced,
+                "written": self.written,
+                "flushes": self.flushes,
+                "failures": self.failures,
+            }
+
+
+_buffer: Optional[LikeBuffer] = None
+_buffer_lock = threading.Lock()
+
+
+def get_buffer() -> Optional[LikeBuffer]:
+    """This worker's like buffer, created on first use; None when write-behind is off."""
+    global _buffer
+    if not settings.LIKE_WRITE_BEHIND:
+        return None
+    with _buffer_lock:
+        if _buffer is None:
+            _buffer = LikeBuffer(
+                SessionLocal, interval_ms=settings.LIKE_FLUSH_INTERVAL_MS, max_events=settings.LIKE_FLUSH_MAX_EVENTS
+            )
+        return _buffer
+
+
+def overlay_likes(viewer_id: int, states: Dict[int, Tuple[int, bool]]) -> Dict[int, Tuple[int, bool]]:
+    """
+    Apply the viewer's buffered likes to {task_id: (likes_count, liked by viewer)} read from the
+    database, so users see their own likes and unlikes before they are flushed.
+    """
+    buffer = _buffer
+    if buffer is None:
+        return states
+    for task_id, liked in buffer.overlay(viewer_id, states).items():
+        likes_count, was_liked = states[task_id]
+        states[task_id] = (likes_count + int(liked) - int(was_liked), liked)
+    return states
+
+
+def read_likes_count(db: Session, task_id: int) -> Optional[int]:
+    """
+    Task.likes_count with every user's buffered likes and unlikes applied; None if the task does
+    not exist.
+    """
+    buffer = _buffer
+    if buffer is None:
+        return likes_service.get_likes_count(db, task_id)
+    # 意図を先に読む: その後に書き込まれた意図は、下の読み込みで likes_count と既存のいいねの両方に反映済み
+    intents = buffer.task_intents(task_id)
+    likes_count = likes_service.get_likes_count(db, task_id)
+    if likes_count is None or not intents:
+        return likes_count
+    liked = likes_service.get_liking_user_ids(db, task_id, intents)
+    for user_id, liking in intents.items():
+        likes_count += int(liking) - int(user_id in liked)
+    return likes_count
+
+
+def pending_version(user_id: int) -> int:
+    buffer = _buffer
+    return buffer.version(user_id) if buffer is not None else 0
+
+
+def stats() -> Optional[Dict[str, Any]]:
+    buffer = _buffer
+    return buffer.stats() if buffer is not None else None
+
+
+def shutdown() -> None:
+    # 閉じたバッファは残しておき、終了処理の後に届いたいいねはその場で書き込ませる
+    with _buffer_lock:
+        if _buffer is not None:
+            _buffer.close()
@@ -0,0 +1,159 @@
+# app/services/likes.py
+import datetime
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import and_, delete, func, literal, select, tuple_, update
+from sqlalchemy.orm import Session
+
+from app.api.pagination import paginate
+from app.db.dialect import insert
+from app.models.task import Task
+from app.models.task_like import TaskLike
+from app.models.user import User
+from app.services import changes as changes_service
+
+
+def adjust_likes_count(db: Session, task_id: int, delta: int) -> Optional[int]:
+    """
+    Atomically shift Task.likes_count; call in the same transaction as the TaskLike change.
+
+    Returns the task's owner_id (None if the task does not exist).
+    """
+    # updated_at はタスク自体の変更時刻（完了日の集計に使う）なので onupdate を抑止する
+    return db.execute(
+        update(Task)
+        .where(Task.id == task_id)
+        .values(likes_count=Task.likes_count + delta, updated_at=Task.updated_at)
+        .returning(Task.owner_id)
+    ).scalar()
+
+
+def add_like(db: Session, task_id: int, user_id: int) -> bool:
+    """
+    Insert the like in one statement unless it exists; True if a row was inserted.
+
+    False means the user already likes the task or the task does not exist. The unique
+    (task_id, user_id) index makes concurrent likes from one user insert at most once.
+    """
+    # SQLite では外部キーを強制していないので、VALUES ではなく task から SELECT して存在確認を兼ねる
+    source = select(Task.id, literal(user_id), literal(datetime.datetime.utcnow())).where(Task.id == task_id)
+    inserted = db.execute(
+        insert(db, TaskLike)
+        .from_select(["task_id", "user_id", "created_at"], source)
+        .on_conflict_do_nothing(index_elements=["task_id", "user_id"])
+        .returning(TaskLike.id)
+    ).first()
+    return inserted is not None
+
+
+def remove_like(db: Session, task_id: int, user_id: int) -> bool:
+    """Delete the like in one statement; True if it existed."""
+    deleted = db.execute(
+        delete(TaskLike).where(TaskLike.task_id == task_id, TaskLike.user_id == user_id).returning(TaskLike.id)
+    ).first()
+    return deleted is not None
+
+
+def apply_like_intents(db: Session, intents: Dict[Tuple[int, int], bool]) -> None:
+    """
+    Write {(task_id, user_id): liked} intents in the caller's transaction (the write-behind flush).
+
+    Each intent has the same effect as the like/unlike endpoint, but the whole batch is one insert,
+    one delete, one likes_count update per task and one change-log write.
+    """
+    owners = dict(db.query(Task.id, Task.owner_id).filter(Task.id.in_({task_id for task_id, _ in intents})).all())
+    # 書き込みまでに削除されたタスクへの意図は捨てる（単体のエンドポイントの 404 に相当）
+    likes = [key for key, liked in intents.items() if liked and key[0] in owners]
+    unlikes = [key for key, liked in intents.items() if not liked and key[0] in owners]
+
+    added: List[Tuple[int, int]] = []
+    if likes:
+        now = datetime.datetime.utcnow()
+        added = db.execute(
+            insert(db, TaskLike)
+            .values([{"task_id": task_id, "user_id": user_id, "created_at": now} for task_id, user_id in likes])
+            .on_conflict_do_nothing(index_elements=["task_id", "user_id"])
+            .returning(TaskLike.task_id, TaskLike.user_id)
+        ).all()
+    removed: List[Tuple[int, int]] = []
+    if unlikes:
+        removed = db.execute(
+            delete(TaskLike)
+            .where(tuple_(TaskLike.task_id, TaskLike.user_id).in_(unlikes))
+            .returning(TaskLike.task_id, TaskLike.user_id),
+            execution_options={"synchronize_session": False},
+        ).all()
+
+    deltas = Counter(task_id for task_id, _ in added)
+    deltas.subtract(task_id for task_id, _ in removed)
+    for task_id, delta in deltas.items():
+        if delta:
+            adjust_likes_count(db, task_id, delta)
+    changes_service.record_like_changes(db, [(task_id, user_id, owners[task_id]) for task_id, user_id in added])
+    changes_service.record_like_changes(
+        db, [(task_id, user_id, owners[task_id]) for task_id, user_id in removed], deleted=True
+    )
+
+
+def get_like_summaries(db: Session, viewer_id: int, task_ids: Iterable[int]) -> Dict[int, Tuple[int, bool]]:
+    """
+    {task_id: (likes_count, liked by viewer_id)} for the tasks that exist, in one query.
+
+    likes_count is the denormalized column, and the viewer's like is one index lookup per task
+    through the outer join on the unique (task_id, user_id) index.
+    """
+    rows = (
+        db.query(Task.id, Task.likes_count, TaskLike.id)
+        .outerjoin(TaskLike, and_(TaskLike.task_id == Task.id, TaskLike.user_id == viewer_id))
+        .filter(Task.id.in_(set(task_ids)))
+    )
+    return {task_id: (likes_count, like_id is not None) for task_id, likes_count, like_id in rows}
+
+
+def get_likes_count(db: Session, task_id: int) -> Optional[int]:
+    """The denormalized likes_count; None if the task does not exist."""
+    return db.query(Task.likes_count).filter(Task.id == task_id).scalar()
+
+
+def get_liking_user_ids(db: Session, task_id: int, user_ids: Iterable[int]) -> Set[int]:
+    """Which of user_ids have a committed like on the task."""
+    rows = db.query(TaskLike.user_id).filter(TaskLike.task_id == task_id, TaskLike.user_id.in_(set(user_ids)))
+    return {row[0] for row in rows}
+
+
+def get_likers(
+    db: Session, task_id: int, *, skip: int, limit: int, cursor: Optional[str], with_users: bool
+) -> List[Any]:
+    """
+    One page of a task's likes, newest first, as rows of (id, created_at, user_id) plus username
+    when with_users is set.
+
+    Only these columns are read, and the username comes from a join in the same query.
+    """
+    query = db.query(TaskLike.id, TaskLike.created_at, TaskLike.user_id).filter(TaskLike.task_id == task_id)
+    if with_users:
+        query = query.join(User, User.id == TaskLike.user_id).add_columns(User.username)
+    return paginate(
+        query, TaskLike.created_at, TaskLike.id, skip=skip, limit=limit, cursor=cursor, descending=True
+    ).all()
+
+
+def task_exists(db: Session, task_id: int) -> bool:
+    return db.query(select(Task.id).where(Task.id == task_id).exists()).scalar()
+
+
+def reconcile_likes_counts(db: Session) -> int:
+    """
+    Recompute every Task.likes_count from TaskLike in one statement.
+
+    Returns the number of tasks whose counter had drifted.
+    """
+    actual = select(func.count(TaskLike.id)).where(TaskLike.task_id == Task.id).scalar_subquery()
+    result = db.execute(
+        update(Task)
+        .where(Task.likes_count.is_distinct_from(actual))
+        .values(likes_count=actual, updated_at=Task.updated_at),
+        execution_options={"synchronize_session": False},
+    )
+    return result.rowcount
@@ -0,0 +1,113 @@
+# app/services/search.py
+# タスクの全文検索（SQLite FTS5、trigram トークナイザーなので日本語の部分一致にも対応）
+from typing import List
+
+from sqlalchemy import Integer, column, func, literal_column, or_, select, table, text
+from sqlalchemy.orm import Session, joinedload
+
+from app.models.task import Task
+from app.services import follow_graph
+
+# task を外部コンテンツとする FTS5 テーブル（rowid = task.id）。トリガーで task と同期する
+FTS_TABLE = "task_fts"
+# trigram は3文字未満の語を検索できない
+MIN_TERM_LENGTH = 3
+# bm25 の列ごとの重み（タイトルの一致を説明文より重視）
+TITLE_WEIGHT = 10.0
+DESCRIPTION_WEIGHT = 1.0
+
+task_fts = table(FTS_TABLE, column("rowid", Integer))
+
+CREATE_STATEMENTS = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        title, description, content='task', content_rowid='id', tokenize='trigram'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON task BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, description) VALUES (new.id, new.title, new.description);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON task BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+    END""",
+    # likes_count などの更新でインデックスを書き換えないよう、対象列の更新時だけ発火させる
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF title, description ON task BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO {FTS_TABLE}(rowid, title, description) VALUES (new.id, new.title, new.description);
+    END""",
+]
+
+
+class InvalidSearchQuery(ValueError):
+    """Raised for queries FTS5 cannot answer; endpoints map it to 400."""
+
+
+def is_supported(db: Session) -> bool:
+    return db.get_bind().dialect.name == "sqlite"
+
+
+def create_index(db: Session) -> None:
+    """Create the FTS table and sync triggers (idempotent) and index existing tasks."""
+    for statement in CREATE_STATEMENTS:
+        db.execute(text(statement))
+    rebuild_index(db)
+
+
+def rebuild_index(db: Session) -> None:
+    db.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
+
+
+def build_match_query(q: str) -> str:
+    """
+    Turn user input into an FTS5 query: every whitespace-separated term must match.
+
+    Terms are quoted so FTS5 operators and punctuation in the input are matched literally.
+    """
+    terms = q.split()
+    if not terms:
+        raise InvalidSearchQuery("Search query is empty")
+    if any(len(term) < MIN_TERM_LENGTH for term in terms):
+        raise InvalidSearchQuery(f"Each search term must be at least {MIN_TERM_LENGTH} characters")
+    return " ".join('"' + term.replace('"', '""') + '"' for term in terms)
+
+
+def search_tasks(db: Session, viewer_id: int, q: str, *, skip: int, limit: int) -> List[Task]:
+    """
+    Tasks matching q that viewer_id may see, best match first.
+
+    Visible means the viewer's own tasks, public tasks, and followers-only tasks of users
+    the viewer follows (the same rule as the home timeline plus explore). Whether the viewer
+    follows an owner is checked in the in-memory follow graph while reading the ranked matches,
+    which stops once the page is filled.
+    """
+    match = build_match_query(q)
+    graph = follow_graph.get_graph(db)
+    rank = func.bm25(literal_column(FTS_TABLE), TITLE_WEIGHT, DESCRIPTION_WEIGHT)
+    ranked = (
+        select(Task.id, Task.owner_id, Task.privacy_level)
+        .join(task_fts, task_fts.c.rowid == Task.id)
+        .where(
+            literal_column(FTS_TABLE).match(match),
+            or_(Task.owner_id == viewer_id, Task.privacy_level.in_(("public", "followers"))),
+        )
+        .order_by(rank, Task.id)
+        # ORM の結果は既定で全件を先に読むので、ページが埋まった時点で止められるよう少しずつ読む
+        .execution_options(yield_per=skip + limit)
+    )
+
+    task_ids: List[int] = []
+    result = db.execute(ranked)
+    try:
+        for task_id, owner_id, privacy_level in result:
+            if owner_id == viewer_id or privacy_level == "public" or graph.is_following(viewer_id, owner_id):
+                task_ids.append(task_id)
+                if len(task_ids) == skip + limit:
+                    break
+    finally:
+        result.close()
+
+    page_ids = task_ids[skip:]
+    if not page_ids:
+        return []
+    tasks = {task.id: task for task in db.query(Task).filter(Task.id.in_(page_ids)).options(joinedload(Task.owner))}
+    return [tasks[task_id] for task_id in page_ids]
@@ -0,0 +1,246 @@
+# app/services/stats.py
+from collections import defaultdict
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import case, delete, func
+from sqlalchemy.orm import Session
+
+from app.db.dialect import insert
+from app.models.daily_task_stats import DailyTaskStats
+from app.models.task import Task
+from app.models.user_streak import UserStreak
+
+# 日付 -> [created, completed, closed]
+Contribution = Dict[date, List[int]]
+
+CREATED, COMPLETED, CLOSED = 0, 1, 2
+
+
+def contribution(task: Task) -> Contribution:
+    """
+    Counts a single task adds to its owner's daily rollups.
+
+    A task is open from its creation day through its due date (or indefinitely);
+    a due date before creation is treated as due on the creation day.
+    """
+    counts: Contribution = defaultdict(lambda: [0, 0, 0])
+    if task.created_at is not None:
+        created_day = task.created_at.date()
+        counts[created_day][CREATED] += 1
+        if task.due_date is not None:
+            counts[max(task.due_date.date(), created_day)][CLOSED] += 1
+    if task.is_completed and task.updated_at is not None:
+        counts[task.updated_at.date()][COMPLETED] += 1
+    return counts
+
+
+def sum_contributions(contributions: Iterable[Optional[Contribution]]) -> Contribution:
+    """Combine several tasks' contributions, e.g. to record a batch with one record_task_change."""
+    total: Contribution = defaultdict(lambda: [0, 0, 0])
+    for counts_by_day in contributions:
+        for day, counts in (counts_by_day or {}).items():
+            for i, count in enumerate(counts):
+                total[day][i] += count
+    return total
+
+
+def upsert_daily_stats(db: Session, user_id: int, deltas: Contribution) -> None:
+    rows = [
+        {"user_id": user_id, "day": day, "created_count": c, "completed_count": comp, "closed_count": closed}
+        for day, (c, comp, closed) in deltas.items()
+        if c or comp or closed
+    ]
+    if not rows:
+        return
+
+    stmt = insert(db, DailyTaskStats)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["user_id", "day"],
+        set_={
+            "created_count": DailyTaskStats.created_count + stmt.excluded.created_count,
+            "completed_count": DailyTaskStats.completed_count + stmt.excluded.completed_count,
+            "closed_count": DailyTaskStats.closed_count + stmt.excluded.closed_count,
+        },
+    )
+    db.execute(stmt, rows)
+
+
+def record_task_change(db: Session, user_id: int, old: Optional[Contribution], new: Optional[Contribution]) -> None:
+    """
+    Apply the difference between a task's old and new contribution to the rollups.
+
+    Pass old=None for a created task and new=None for a deleted one. Call after flush so
+    created_at/updated_at defaults are populated.
+    """
+    deltas: Contribution = defaultdict(lambda: [0, 0, 0])
+    for day, counts in (new or {}).items():
+        for i, count in enumerate(counts):
+            deltas[day][i] += count
+    for day, counts in (old or {}).items():
+        for i, count in enumerate(counts):
+            deltas[day][i] -= count
+    upsert_daily_stats(db, user_id, deltas)
+
+    # 完了日が増減した場合はストリークも更新
+    completion_changes = {day: counts[COMPLETED] for day, counts in deltas.items() if counts[COMPLETED]}
+    if completion_changes:
+        update_streak(db, user_id, completion_changes)
+
+
+def rebuild_daily_stats(db: Session) -> None:
+    """Regenerate every user's rollups from Task."""
+    db.execute(delete(DailyTaskStats))
+
+    per_user: Dict[int, Contribution] = defaultdict(lambda: defaultdict(lambda: [0, 0, 0]))
+    tasks = db.query(Task.owner_id, Task.created_at, Task.due_date, Task.is_completed, Task.updated_at).filter(
+        Task.owner_id.isnot(None)
+    )
+    for task in tasks.yield_per(1000):
+        for day, counts in contribution(task).items():
+            for i, count in enumerate(counts):
+                per_user[task.owner_id][day][i] += count
+
+    for user_id, deltas in per_user.items():
+        upsert_daily_stats(db, user_id, deltas)
+
+    db.execute(delete(UserStreak))
+    for user_id in per_user:
+        recompute_streak(db, user_id)
+
+
+def read_period_counts(
+    db: Session, user_id: int, periods: List[Tuple[date, date]]
+) -> Tuple[int, int, List[Tuple[int, int]]]:
+    """
+    Totals and (open, completed) task counts for each [start, end] period, from the rollups.
+
+    A task is open in a period if it was created on or before the end and its open range
+    reaches the start. Reads one aggregate row plus one rollup row per day in the window.
+    """
+    origin = min(start for start, _ in periods)
+    horizon = max(end for _, end in periods)
+
+    total_created, total_completed, created_before, closed_before = (
+        db.query(
+            func.coalesce(func.sum(DailyTaskStats.created_count), 0),
+            func.coalesce(func.sum(DailyTaskStats.completed_count), 0),
+            func.coalesce(func.sum(case((DailyTaskStats.day < origin, DailyTaskStats.created_count), else_=0)), 0),
+            func.coalesce(func.sum(case((DailyTaskStats.day < origin, DailyTaskStats.closed_count), else_=0)), 0),
+        )
+        .filter(DailyTaskStats.user_id == user_id)
+        .one()
+    )
+    rows = (
+        db.query(DailyTaskStats)
+        .filter(DailyTaskStats.user_id == user_id, DailyTaskStats.day >= origin, DailyTaskStats.day <= horizon)
+        .all()
+    )
+    by_day = {row.day: row for row in rows}
+
+    # 累積和: created_upto[i] は origin+i 日まで、closed_before_day[i] / completed_before_day[i] は origin+i 日より前
+    window = (horizon - origin).days + 1
+    created_upto, closed_before_day, completed_before_day = [], [closed_before], [0]
+    created_sum = created_before
+    for i in range(window):
+        row = by_day.get(origin + timedelta(days=i))
+        created_sum += row.created_count if row else 0
+        created_upto.append(created_sum)
+        closed_before_day.append(closed_before_day[-1] + (row.closed_count if row else 0))
+        completed_before_day.append(completed_before_day[-1] + (row.completed_count if row else 0))
+
+    counts = []
+    for start, end in periods:
+        first, last = (start - origin).days, (end - origin).days
+        open_tasks = created_upto[last] - closed_before_day[first]
+        counts.append((open_tasks, completed_before_day[last + 1] - completed_before_day[first]))
+    return total_created, total_completed, counts
+
+
+def read_completion_days(db: Session, user_id: int) -> List[date]:
+    """Days on which the user completed at least one task, oldest first."""
+    rows = (
+        db.query(DailyTaskStats.day)
+        .filter(DailyTaskStats.user_id == user_id, DailyTaskStats.completed_count > 0)
+        .order_by(DailyTaskStats.day)
+        .all()
+    )
+    return [row[0] for row in rows]
+
+
+def compute_streak(completion_days: List[date]) -> Tuple[int, int, Optional[date]]:
+    """(run ending on the last completion day, longest run, last completion day) from sorted days."""
+    if not completion_days:
+        return 0, 0, None
+
+    longest_run = current_run = 1
+    for i in range(1, len(completion_days)):
+        if (completion_days[i] - completion_days[i - 1]).days == 1:  # 連続した日
+            current_run += 1
+        else:
+            current_run = 1
+        longest_run = max(longest_run, current_run)
+
+    return current_run, longest_run, completion_days[-1]
+
+
+def recompute_streak(db: Session, user_id: int) -> UserStreak:
+    """Full recompute from the rollups; used when a completion is undone or backdated."""
+    current_run, longest_run, last_completed_date = compute_streak(read_completion_days(db, user_id))
+    streak = db.get(UserStreak, user_id) or UserStreak(user_id=user_id)
+    streak.current_run = current_run
+    streak.longest_run = longest_run
+    streak.last_completed_date = last_completed_date
+    db.add(streak)
+    db.flush()
+    return streak
+
+
+def update_streak(db: Session, user_id: int, completion_changes: Dict[date, int]) -> None:
+    """
+    Update the cached streak after the rollups changed by completion_changes (day -> delta).
+
+    Only a new completion day on or after the last one is applied incrementally; losing a
+    completion day or gaining an earlier one falls back to recompute_streak.
+    """
+    streak = db.get(UserStreak, user_id)
+    if streak is None:
+        recompute_streak(db, user_id)
+        return
+
+    remaining = dict(
+        db.query(DailyTaskStats.day, DailyTaskStats.completed_count).filter(
+            DailyTaskStats.user_id == user_id, DailyTaskStats.day.in_(list(completion_changes))
+        )
+    )
+    new_days = []
+    for day, delta in completion_changes.items():
+        count = remaining.get(day, 0)
+        if delta < 0 and count <= 0:
+            # 完了日がなくなった
+            recompute_streak(db, user_id)
+            return
+        if delta > 0 and count == delta:
+            new_days.append(day)
+
+    last = streak.last_completed_date
+    for day in sorted(new_days):
+        if last is not None and day < last:
+            # 過去日への完了
+            recompute_streak(db, user_id)
+            return
+        if last is not None and (day - last).days == 1:
+            streak.current_run += 1
+        else:
+            streak.current_run = 1
+        streak.longest_run = max(streak.longest_run, streak.current_run)
+        last = streak.last_completed_date = day
+    db.add(streak)
+
+
+def read_streak(db: Session, user_id: int) -> Tuple[int, int, Optional[date]]:
+    """Cached (current run, longest run, last completion day); computed without saving if missing."""
+    streak = db.get(UserStreak, user_id)
+    if streak is None:
+        return compute_streak(read_completion_days(db, user_id))
+    return streak.current_run, streak.longest_run, streak.last_completed_date
@@ -0,0 +1,217 @@
+# app/services/timeline.py
+from typing import Any, List, Optional, Sequence, Tuple
+
+from sqlalchemy import delete, func, literal, select
+from sqlalchemy.orm import Query, Session, joinedload
+
+from app.api.pagination import paginate
+from app.core.config import settings
+from app.db.dialect import insert
+from app.models.task import Task
+from app.models.timeline_entry import PulledAuthor, TimelineEntry
+from app.models.user_follow import UserFollow
+from app.services import changes as changes_service
+from app.services import follow_graph
+
+# フォロワー（と本人）のタイムラインに表示されるプライバシーレベル
+VISIBLE_PRIVACY_LEVELS = ("public", "followers")
+
+ENTRY_COLUMNS = ["user_id", "task_id", "owner_id", "created_at"]
+
+
+def is_visible(privacy_level: Optional[str]) -> bool:
+    return privacy_level in VISIBLE_PRIVACY_LEVELS
+
+
+def is_pulled(db: Session, user_id: int) -> bool:
+    return db.get(PulledAuthor, user_id) is not None
+
+
+def fan_out_task(db: Session, task: Task) -> None:
+    """
+    Push a visible task into its owner's and followers' timelines.
+
+    Owners with more than TIMELINE_FANOUT_MAX_FOLLOWERS followers are marked as pulled
+    and only get their own entry; followers read their tasks at request time instead.
+    """
+    if not is_visible(task.privacy_level):
+        return
+
+    own_entry = {"user_id": task.owner_id, "task_id": task.id, "owner_id": task.owner_id, "created_at": task.created_at}
+    db.execute(insert(db, TimelineEntry).values(**own_entry).on_conflict_do_nothing())
+
+    if is_pulled(db, task.owner_id):
+        return
+
+    followers_count = count_followers(db, task.owner_id, settings.TIMELINE_FANOUT_MAX_FOLLOWERS + 1)
+    if followers_count > settings.TIMELINE_FANOUT_MAX_FOLLOWERS:
+        db.execute(insert(db, PulledAuthor).values(user_id=task.owner_id).on_conflict_do_nothing())
+        return
+
+    followers = select(
+        UserFollow.follower_id,
+        literal(task.id),
+        literal(task.owner_id),
+        literal(task.created_at),
+    ).where(UserFollow.followed_id == task.owner_id)
+    db.execute(insert(db, TimelineEntry).from_select(ENTRY_COLUMNS, followers).on_conflict_do_nothing())
+
+
+def count_followers(db: Session, user_id: int, limit: int) -> int:
+    """
+    Followers of user_id, counted up to limit.
+
+    Fan-out runs in the write transaction, so the follow graph is used as it is, without a refresh;
+    before this worker has loaded it, only up to limit follows are counted in the database.
+    """
+    graph = follow_graph.peek()
+    if graph.loaded:
+        return len(graph.followers(user_id))
+    followers = select(UserFollow.follower_id).where(UserFollow.followed_id == user_id).limit(limit).subquery()
+    return db.execute(select(func.count()).select_from(followers)).scalar_one()
+
+
+def retract_task(db: Session, task_id: int) -> None:
+    """Remove a task from every timeline (deleted or made private)."""
+    retract_tasks(db, [task_id])
+
+
+def retract_tasks(db: Session, task_ids: Sequence[int]) -> None:
+    if task_ids:
+        db.execute(delete(TimelineEntry).where(TimelineEntry.task_id.in_(task_ids)))
+
+
+def backfill_follow(db: Session, follower_id: int, followed_id: int) -> None:
+    """Copy the followed user's visible tasks into the new follower's timeline."""
+    if is_pulled(db, followed_id):
+        return
+
+    tasks = select(literal(follower_id), Task.id, Task.owner_id, Task.created_at).where(
+        Task.owner_id == followed_id, Task.privacy_level.in_(VISIBLE_PRIVACY_LEVELS)
+    )
+    db.execute(insert(db, TimelineEntry).from_select(ENTRY_COLUMNS, tasks).on_conflict_do_nothing())
+
+
+def prune_follow(db: Session, follower_id: int, followed_id: int) -> None:
+    """Drop the unfollowed user's tasks from the follower's timeline."""
+    db.execute(
+        delete(TimelineEntry).where(TimelineEntry.user_id == follower_id, TimelineEntry.owner_id == followed_id)
+    )
+
+
+def followed_pulled_authors(db: Session, user_id: int) -> List[int]:
+    """Pulled authors that user_id follows, checked against the in-memory follow graph."""
+    graph = follow_graph.get_graph(db)
+    # 誰もフォローしていなければ pulled な作成者の問い合わせは不要
+    if not graph.following(user_id):
+        return []
+    # pulled な作成者はフォロワーが TIMELINE_FANOUT_MAX_FOLLOWERS を超えるユーザーだけで少ないので、全件読んで絞り込む
+    return [row[0] for row in db.query(PulledAuthor.user_id) if graph.is_following(user_id, row[0])]
+
+
+def stream_window(skip: int, limit: int, cursor: Optional[str], merged: bool) -> Tuple[int, int]:
+    # 2つのストリームをマージする場合、オフセットはマージ後に適用する
+    return (0, skip + limit) if merged and not cursor else (skip, limit)
+
+
+def get_home_version(db: Session, user_id: int, *, skip: int, limit: int, cursor: Optional[str]) -> Tuple[Any, ...]:
+    """
+    Version of one home timeline page, for its ETag.
+
+    Made of the viewer's latest seq (their follows and likes), the inbox entries in the page's window,
+    and the latest seq of those entries' owners and of followed pulled authors (edits, likes and new
+    tasks). Seqs are global, so one max covers every owner. The cost grows with the page size, not
+    with the number of followed users.
+    """
+    pulled_ids = followed_pulled_authors(db, user_id)
+    pulled = []
+    if pulled_ids:
+        pulled = (
+            db.query(PulledAuthor.user_id, changes_service.latest_seq(PulledAuthor.user_id))
+            .filter(PulledAuthor.user_id.in_(pulled_ids))
+            .all()
+        )
+    stream_skip, stream_limit = stream_window(skip, limit, cursor, bool(pulled_ids))
+    entries = paginate(
+        inbox_query(db, user_id, TimelineEntry.task_id, changes_service.latest_seq(TimelineEntry.owner_id)),
+        TimelineEntry.created_at,
+        TimelineEntry.task_id,
+        skip=stream_skip,
+        limit=stream_limit,
+        cursor=cursor,
+        descending=True,
+    ).all()
+    latest = max((seq or 0 for _, seq in [*entries, *pulled]), default=0)
+    return changes_service.user_version(db, user_id), latest, tuple(sorted(task_id for task_id, _ in entries))
+
+
+def inbox_query(db: Session, user_id: int, *columns: Any) -> Query:
+    return (
+        db.query(*columns)
+        .select_from(TimelineEntry)
+        .join(Task, TimelineEntry.task_id == Task.id)
+        .filter(TimelineEntry.user_id == user_id, Task.privacy_level.in_(VISIBLE_PRIVACY_LEVELS))
+    )
+
+
+def get_home_tasks(db: Session, user_id: int, *, skip: int, limit: int, cursor: Optional[str]) -> List[Task]:
+    """
+    Read a page of the home timeline, newest first.
+
+    Entries come from the materialized inbox, merged with tasks of followed pulled authors.
+    """
+    pulled_ids = followed_pulled_authors(db, user_id)
+    stream_skip, stream_limit = stream_window(skip, limit, cursor, bool(pulled_ids))
+
+    inbox = inbox_query(db, user_id, Task)
+    tasks = (
+        paginate(
+            inbox,
+            TimelineEntry.created_at,
+            TimelineEntry.task_id,
+            skip=stream_skip,
+            limit=stream_limit,
+            cursor=cursor,
+            descending=True,
+        )
+        .options(joinedload(Task.owner))
+        .all()
+    )
+    if not pulled_ids:
+        return tasks
+
+    pulled = db.query(Task).filter(Task.owner_id.in_(pulled_ids), Task.privacy_level.in_(VISIBLE_PRIVACY_LEVELS))
+    tasks += (
+        paginate(pulled, Task.created_at, Task.id, skip=stream_skip, limit=stream_limit, cursor=cursor, descending=True)
+        .options(joinedload(Task.owner))
+        .all()
+    )
+
+    # 作成者が pulled になる前のタスクは両方に含まれ得るので重複を除く
+    merged = sorted({task.id: task for task in tasks}.values(), key=lambda t: (t.created_at, t.id), reverse=True)
+    if cursor:
+        return merged[:limit]
+    return merged[skip : skip + limit]
+
+
+def rebuild_timelines(db: Session) -> None:
+    """Regenerate every materialized timeline from Task and UserFollow."""
+    db.execute(delete(TimelineEntry))
+
+    heavy_authors = (
+        select(UserFollow.followed_id)
+        .group_by(UserFollow.followed_id)
+        .having(func.count(UserFollow.follower_id) > settings.TIMELINE_FANOUT_MAX_FOLLOWERS)
+    )
+    db.execute(insert(db, PulledAuthor).from_select(["user_id"], heavy_authors).on_conflict_do_nothing())
+
+    visible = Task.privacy_level.in_(VISIBLE_PRIVACY_LEVELS)
+    own = select(Task.owner_id, Task.id, Task.owner_id, Task.created_at).where(visible)
+    db.execute(insert(db, TimelineEntry).from_select(ENTRY_COLUMNS, own))
+
+    followed = (
+        select(UserFollow.follower_id, Task.id, Task.owner_id, Task.created_at)
+        .join(Task, Task.owner_id == UserFollow.followed_id)
+        .where(visible, Task.owner_id.not_in(select(PulledAuthor.user_id)))
+    )
+    db.execute(insert(db, TimelineEntry).from_select(ENTRY_COLUMNS, followed).on_conflict_do_nothing())
@@ -0,0 +1,136 @@
+# scripts/bench_likes.py
+# いいねのベンチマーク: 多数のスレッドから1つのタスクに別々のユーザーのいいね・いいね解除を送り続け、
+# 直接書き込む場合と書き込み遅延（LIKE_WRITE_BEHIND）の場合で、書き込まれたいいねの件数/秒を比べる
+# 使い方（whattodo/ で実行）: python -m scripts.bench_likes [--seconds 5] [--threads 16] [--users 20000]
+# 一時ファイルの SQLite DB を本番プロファイル（WAL）で使う
+# （app.core.config は読み込み時に環境変数を読むので、app より先に設定する）
+import argparse
+import datetime
+import os
+import shutil
+import tempfile
+import threading
+import time
+from typing import List, Tuple
+
+_db_dir = tempfile.mkdtemp(prefix="whattodo-bench-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_db_dir, 'bench.db')}"
+os.environ["SQLITE_PRODUCTION_MODE"] = "true"
+
+from sqlalchemy import func  # noqa: E402
+
+from app.api.api_v1.endpoints import likes as likes_endpoints  # noqa: E402
+from app.core.config import settings  # noqa: E402
+from app.db import migrations, session  # noqa: E402
+from app.models.task import Task  # noqa: E402
+from app.models.task_like import TaskLike  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.services import like_buffer  # noqa: E402
+
+
+class Liker:
+    """Stands in for the authenticated user the endpoints receive."""
+
+    def __init__(self, user_id: int) -> None:
+        self.id = user_id
+
+
+def seed(n_users: int) -> Tuple[List[int], List[int]]:
+    """n_users users and one task per mode to like; returns (user ids, task ids)."""
+    now = datetime.datetime.utcnow()
+    with session.get_engine().begin() as conn:
+        conn.execute(
+            User.__table__.insert(),
+            [
+                dict(email=f"liker{i}@example.com", username=f"liker{i}", hashed_password="x", created_at=now)
+                for i in range(1, n_users + 1)
+            ],
+        )
+        user_ids = list(conn.execute(User.__table__.select().with_only_columns(User.id)).scalars())
+        task_ids = [
+            conn.execute(
+                Task.__table__.insert().values(title=title, privacy_level="public", owner_id=user_ids[0])
+            ).inserted_primary_key[0]
+            for title in ("direct", "buffered")
+        ]
+    return user_ids, task_ids
+
+
+def hammer(task_id: int, user_ids: List[int], threads: int, seconds: float) -> int:
+    """Like and unlike task_id from threads threads for seconds; returns the number of requests."""
+    done = [0] * threads
+    stop = time.perf_counter() + seconds
+
+    def run(k: int) -> None:
+        i = k
+        while time.perf_counter() < stop:
+            # ユーザーを一巡するごとにいいねといいね解除を切り替える
+            liker = Liker(user_ids[i % len(user_ids)])
+            endpoint = likes_endpoints.like_task if (i // len(user_ids)) % 2 == 0 else likes_endpoints.unlike_task
+            db, read_db = session.SessionLocal(), session.ReadSessionLocal()
+            try:
+                endpoint(task_id, db, read_db, liker)
+            finally:
+                db.close()
+                read_db.close()
+            done[k] += 1
+            i += threads
+
+    workers = [threading.Thread(target=run, args=(k,)) for k in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return sum(done)
+
+
+def measure(
+    write_behind: bool, task_id: int, user_ids: List[int], threads: int, seconds: float
+) -> Tuple[float, float]:
+    """(committed likes per second, CPU ms per like) with LIKE_WRITE_BEHIND set to write_behind."""
+    settings.LIKE_WRITE_BEHIND = write_behind
+    started, cpu_started = time.perf_counter(), time.process_time()
+    requests = hammer(task_id, user_ids, threads, seconds)
+    # 書き込み遅延ではバッファが空になるまでを含める
+    like_buffer.shutdown()
+    elapsed, cpu = time.perf_counter() - started, time.process_time() - cpu_started
+    return requests / elapsed, cpu / requests * 1000
+
+
+def check_counts(task_id: int) -> Tuple[int, int]:
+    """(Task.likes_count, like rows) for task_id; they must match."""
+    db = session.SessionLocal()
+    try:
+        likes = db.query(func.count(TaskLike.id)).filter(TaskLike.task_id == task_id).scalar()
+        return db.get(Task, task_id).likes_count, likes
+    finally:
+        db.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m scripts.bench_likes", description="Time likes with and without the write-behind buffer"
+    )
+    parser.add_argument("--seconds", type=float, default=5, help="how long each mode runs")
+    parser.add_argument("--threads", type=int, default=16, help="concurrent likers")
+    parser.add_argument("--users", type=int, default=20000, help="distinct users liking the task")
+    args = parser.parse_args()
+
+    try:
+        migrations.upgrade(session.get_engine())
+        user_ids, task_ids = seed(args.users)
+        print(f"{args.threads} threads for {args.seconds:g} s, {args.users} users liking one task")
+        print(f"{'mode':>9} {'likes/s':>9} {'CPU ms/like':>12}  likes_count == rows")
+        # 直接書き込みを先に測る（バッファは一度閉じると同期書き込みに戻る）
+        for write_behind, task_id in zip((False, True), task_ids):
+            per_second, cpu_ms = measure(write_behind, task_id, user_ids, args.threads, args.seconds)
+            likes_count, likes = check_counts(task_id)
+            mode = "buffered" if write_behind else "direct"
+            print(f"{mode:>9} {per_second:>9.0f} {cpu_ms:>12.2f}  {likes_count == likes} ({likes})")
+    finally:
+        session.dispose_engines()
+        shutil.rmtree(_db_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
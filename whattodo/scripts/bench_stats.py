@@ -0,0 +1,210 @@
+# scripts/bench_stats.py
+# 統計（GET /stats/overview）のベンチマーク: 1人のユーザーに大量のタスクを作り、期間ごとに COUNT を発行する
+# 元の実装と、日次集計テーブルから読む現在の実装（compute_overall_stats）の時間と結果を比べる
+# 使い方（whattodo/ で実行）: python -m scripts.bench_stats [--tasks 10000] [--repeat 3]
+# 一時ファイルの SQLite DB を使う（app.core.config は読み込み時に環境変数を読むので、app より先に設定する）
+import argparse
+import calendar
+import datetime
+import os
+import random
+import shutil
+import statistics
+import tempfile
+import time
+from typing import Callable, List, Tuple
+
+_db_dir = tempfile.mkdtemp(prefix="whattodo-bench-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_db_dir, 'bench.db')}"
+
+from sqlalchemy import func, or_  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+from app.api.api_v1.endpoints import stats as stats_endpoints  # noqa: E402
+from app.db import migrations, session  # noqa: E402
+from app.models.task import Task  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.schemas.stats import DailyStats, OverallStats, PeriodStats, StreakInfo  # noqa: E402
+from app.services import stats as stats_service  # noqa: E402
+
+HISTORY_DAYS = 800
+WINDOWS = (1, 30, 365)
+
+
+def seed(db: Session, n_tasks: int) -> int:
+    """One user with n_tasks tasks spread over the last HISTORY_DAYS days; returns the user id."""
+    user = User(email="bench@example.com", username="bench", hashed_password="x")
+    db.add(user)
+    db.flush()
+
+    rng = random.Random(1)
+    now = datetime.datetime.now()
+    tasks = []
+    for _ in range(n_tasks):
+        created_at = now - datetime.timedelta(days=rng.randint(0, HISTORY_DAYS), minutes=rng.randint(0, 1400))
+        # 期限が作成日より前のタスクは集計テーブル導入時に扱いを変えたので、比較できるよう作成日以降にする
+        due_date = None if rng.random() < 0.3 else created_at + datetime.timedelta(days=rng.randint(0, 120))
+        # created_at / updated_at はアプリでは常に設定される
+        updated_at = created_at + datetime.timedelta(days=rng.randint(0, 30))
+        tasks.append(
+            dict(
+                title="task",
+                owner_id=user.id,
+                created_at=created_at,
+                due_date=due_date,
+                is_completed=rng.random() < 0.5,
+                updated_at=updated_at,
+            )
+        )
+    db.execute(Task.__table__.insert(), tasks)
+    stats_service.rebuild_daily_stats(db)
+    db.commit()
+    return user.id
+
+
+def count_open(db: Session, user_id: int, start: datetime.date, end: datetime.date) -> int:
+    return (
+        db.query(func.count(Task.id))
+        .filter(
+            Task.owner_id == user_id,
+            func.date(Task.created_at) <= end,
+            or_(Task.due_date.is_(None), func.date(Task.due_date) >= start),
+        )
+        .scalar()
+    )
+
+
+def count_completed(db: Session, user_id: int, start: datetime.date, end: datetime.date) -> int:
+    return (
+        db.query(func.count(Task.id))
+        .filter(
+            Task.owner_id == user_id,
+            Task.is_completed,
+            func.date(Task.updated_at) >= start,
+            func.date(Task.updated_at) <= end,
+        )
+        .scalar()
+    )
+
+
+def per_period_overall_stats(db: Session, user_id: int, days: int) -> OverallStats:
+    """The original implementation: two COUNT queries per day, week and month, and a streak read from Task."""
+    start_date, end_date = stats_endpoints.get_date_range(days)
+
+    total_tasks = db.query(func.count(Task.id)).filter(Task.owner_id == user_id).scalar()
+    completed_tasks = db.query(func.count(Task.id)).filter(Task.owner_id == user_id, Task.is_completed).scalar()
+    completion_rate = (completed_tasks / total_tasks * 100) if total_tasks > 0 else 0
+
+    # SQLite の date() は文字列を返すので日付に変換する
+    completed_dates = [
+        datetime.date.fromisoformat(row[0])
+        for row in db.query(func.date(Task.updated_at))
+        .filter(Task.owner_id == user_id, Task.is_completed)
+        .distinct()
+        .order_by(func.date(Task.updated_at))
+    ]
+    current_run, longest_streak, last_completed_date = stats_service.compute_streak(completed_dates)
+    today = datetime.datetime.now().date()
+    if last_completed_date is not None and (today - last_completed_date).days <= 1:
+        current_streak = current_run
+    else:
+        current_streak = 0
+    streak_info = StreakInfo(
+        current_streak=current_streak, longest_streak=longest_streak, last_completed_date=last_completed_date
+    )
+
+    def counts(start: datetime.date, end: datetime.date) -> Tuple[int, int, float]:
+        period_tasks = count_open(db, user_id, start, end)
+        period_completed = count_completed(db, user_id, start, end)
+        return period_tasks, period_completed, (period_completed / period_tasks * 100) if period_tasks > 0 else 0
+
+    daily_stats = []
+    current_date = start_date
+    while current_date <= end_date:
+        day_tasks, day_completed, day_rate = counts(current_date, current_date)
+        daily_stats.append(
+            DailyStats(
+                date=current_date, total_tasks=day_tasks, completed_tasks=day_completed, completion_rate=day_rate
+            )
+        )
+        current_date += datetime.timedelta(days=1)
+
+    weekly_stats = []
+    current_week_start = start_date - datetime.timedelta(days=start_date.weekday())
+    while current_week_start <= end_date:
+        week_tasks, week_completed, week_rate = counts(current_week_start, current_week_start + datetime.timedelta(6))
+        weekly_stats.append(
+            PeriodStats(
+                period=f"{current_week_start.isocalendar()[0]}-W{current_week_start.isocalendar()[1]:02d}",
+                total_tasks=week_tasks,
+                completed_tasks=week_completed,
+                completion_rate=week_rate,
+            )
+        )
+        current_week_start += datetime.timedelta(days=7)
+
+    monthly_stats = []
+    current_month_start = datetime.date(start_date.year, start_date.month, 1)
+    while current_month_start <= end_date:
+        month_days = calendar.monthrange(current_month_start.year, current_month_start.month)[1]
+        month_end = datetime.date(current_month_start.year, current_month_start.month, month_days)
+        month_tasks, month_completed, month_rate = counts(current_month_start, month_end)
+        monthly_stats.append(
+            PeriodStats(
+                period=f"{current_month_start.year}-{current_month_start.month:02d}",
+                total_tasks=month_tasks,
+                completed_tasks=month_completed,
+                completion_rate=month_rate,
+            )
+        )
+        current_month_start = month_end + datetime.timedelta(days=1)
+
+    return OverallStats(
+        total_tasks=total_tasks,
+        completed_tasks=completed_tasks,
+        completion_rate=completion_rate,
+        streak_info=streak_info,
+        daily_stats=daily_stats,
+        weekly_stats=weekly_stats,
+        monthly_stats=monthly_stats,
+    )
+
+
+def time_ms(func: Callable[[], OverallStats], repeat: int) -> Tuple[float, OverallStats]:
+    """Median wall time of repeat calls, and the last result."""
+    timings: List[float] = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings), result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m scripts.bench_stats", description="Time the stats overview before and after the rollups"
+    )
+    parser.add_argument("--tasks", type=int, default=10000, help="number of tasks to seed for the user")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per measurement (the median is reported)")
+    args = parser.parse_args()
+
+    try:
+        migrations.upgrade(session.get_engine())
+        db = session.SessionLocal()
+        try:
+            user_id = seed(db, args.tasks)
+            print(f"{args.tasks} tasks over {HISTORY_DAYS} days, median of {args.repeat} runs")
+            print(f"{'days':>5} {'per-period COUNT ms':>20} {'rollups ms':>11}  same result")
+            for days in WINDOWS:
+                old_ms, old = time_ms(lambda: per_period_overall_stats(db, user_id, days), args.repeat)
+                new_ms, new = time_ms(lambda: stats_endpoints.compute_overall_stats(db, user_id, days), args.repeat)
+                print(f"{days:>5} {old_ms:>20.1f} {new_ms:>11.1f}  {old == new}")
+        finally:
+            db.close()
+    finally:
+        session.dispose_engines()
+        shutil.rmtree(_db_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
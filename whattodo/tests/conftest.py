@@ -0,0 +1,62 @@
+# tests/conftest.py
+# テストは一時ファイルの SQLite DB を使う（app.core.config は読み込み時に環境変数を読むので、app より先に設定する）
+import itertools
+import os
+import shutil
+import tempfile
+from typing import Dict, Iterator, Tuple
+
+_db_dir = tempfile.mkdtemp(prefix="whattodo-tests-")
+DATABASE_PATH = os.path.join(_db_dir, "test.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DATABASE_PATH}"
+os.environ.setdefault("PASSWORD_HASH_USE_PROCESSES", "false")
+
+import pytest  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+from app.core.config import settings  # noqa: E402
+from app.db import migrations, session  # noqa: E402
+from app.main import app  # noqa: E402
+
+API = settings.API_V1_STR
+
+_user_numbers = itertools.count(1)
+
+
+@pytest.fixture(scope="session", autouse=True)
+def database() -> Iterator[str]:
+    migrations.upgrade(session.get_engine())
+    yield DATABASE_PATH
+    session.dispose_engines()
+    shutil.rmtree(_db_dir, ignore_errors=True)
+
+
+@pytest.fixture(scope="session")
+def client() -> Iterator[TestClient]:
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def db() -> Iterator[Session]:
+    db = session.SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+@pytest.fixture(scope="session")
+def make_user(client: TestClient):
+    """Sign up a fresh user; returns (auth headers, user id)."""
+
+    def make() -> Tuple[Dict[str, str], int]:
+        name = f"user{next(_user_numbers)}"
+        email, password = f"{name}@example.com", "password123"
+        response = client.post(f"{API}/users/", json={"email": email, "username": name, "password": password})
+        assert response.status_code == 200, response.text
+        token = client.post(f"{API}/login/access-token", data={"username": email, "password": password})
+        return {"Authorization": f"Bearer {token.json()['access_token']}"}, response.json()["id"]
+
+    return make
@@ -0,0 +1,32 @@
+# tests/test_config.py
+# 非同期エンジンの接続先が DATABASE_URL と同じ DB を指すことを確認する
+import pytest
+from pydantic import ValidationError
+
+from app.core.config import Settings
+
+
+@pytest.mark.parametrize(
+    "database_url, async_database_url",
+    [
+        ("sqlite:///./whattodo.db", "sqlite+aiosqlite:///./whattodo.db"),
+        ("sqlite:////var/lib/whattodo/app.db", "sqlite+aiosqlite:////var/lib/whattodo/app.db"),
+        ("postgresql://user:secret@db:5432/whattodo", "postgresql+asyncpg://user:secret@db:5432/whattodo"),
+        ("postgresql+psycopg2://user:secret@db/whattodo", "postgresql+asyncpg://user:secret@db/whattodo"),
+    ],
+)
+def test_async_database_url_follows_database_url(monkeypatch, database_url, async_database_url):
+    monkeypatch.delenv("ASYNC_DATABASE_URL", raising=False)
+    assert Settings(DATABASE_URL=database_url).ASYNC_DATABASE_URL == async_database_url
+
+
+def test_explicit_async_database_url_is_kept():
+    settings = Settings(DATABASE_URL="sqlite:///./a.db", ASYNC_DATABASE_URL="sqlite+aiosqlite:///./b.db")
+    assert settings.ASYNC_DATABASE_URL == "sqlite+aiosqlite:///./b.db"
+
+
+def test_unknown_dialect_fails_only_with_async_db(monkeypatch):
+    monkeypatch.delenv("ASYNC_DATABASE_URL", raising=False)
+    assert Settings(DATABASE_URL="mysql://user@db/whattodo").ASYNC_DATABASE_URL is None
+    with pytest.raises(ValidationError, match="ASYNC_DATABASE_URL"):
+        Settings(DATABASE_URL="mysql://user@db/whattodo", ASYNC_DB=True)
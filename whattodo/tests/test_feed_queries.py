@@ -0,0 +1,57 @@
+# tests/test_feed_queries.py
+# タイムラインのページを組み立てるクエリ数がページの大きさに依存しない（N+1 にならない）ことを確認する
+from typing import Any, Callable, List
+
+import pytest
+from fastapi import Response
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.api.api_v1.endpoints import timeline as timeline_endpoints
+from tests.conftest import API
+
+
+def count_statements(db: Session, fn: Callable[[], Any]) -> int:
+    statements: List[str] = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    engine = db.get_bind()
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        fn()
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    return len(statements)
+
+
+@pytest.fixture(scope="module")
+def feed(client, make_user):
+    """A viewer following two users with 25 public tasks each, half of them liked by the viewer."""
+    viewer_headers, viewer_id = make_user()
+    task_ids = []
+    for _ in range(2):
+        headers, owner_id = make_user()
+        operations = [{"op": "create", "task": {"title": f"task {i}", "privacy_level": "public"}} for i in range(25)]
+        response = client.post(f"{API}/tasks/batch", json={"operations": operations}, headers=headers)
+        assert response.status_code == 200, response.text
+        task_ids += [result["task"]["id"] for result in response.json()]
+        assert client.post(f"{API}/users/{owner_id}/follow", headers=viewer_headers).status_code == 200
+    for task_id in task_ids[::2]:
+        assert client.post(f"{API}/tasks/{task_id}/like", headers=viewer_headers).status_code == 200
+    return viewer_id
+
+
+@pytest.mark.parametrize("read_page", [timeline_endpoints.read_home_timeline, timeline_endpoints.read_public_tasks])
+def test_feed_page_query_count_is_constant(db, feed, read_page):
+    def page_queries(limit: int) -> int:
+        db.expire_all()
+        items: List[Any] = []
+        count = count_statements(
+            db, lambda: items.extend(read_page(db, Response(), feed, skip=0, limit=limit, cursor=None))
+        )
+        assert len(items) == limit
+        return count
+
+    assert page_queries(1) == page_queries(50)
@@ -0,0 +1,52 @@
+# tests/test_follow_graph.py
+# フォローグラフは起動時に読み込まれ、タスク作成（書き込みトランザクション内の fan-out）では読み込まれないことを確認する
+from sqlalchemy import event
+
+from app.core.config import settings
+from app.db import session
+from app.models.timeline_entry import PulledAuthor, TimelineEntry
+from app.services import follow_graph
+from tests.conftest import API
+
+
+def test_lifespan_loads_the_graph(client):
+    assert follow_graph.peek().loaded
+
+
+def test_fan_out_does_not_load_the_graph(client, db, make_user, monkeypatch):
+    owner_headers, owner_id = make_user()
+    followers = [make_user() for _ in range(3)]
+    for headers, _ in followers:
+        assert client.post(f"{API}/users/{owner_id}/follow", headers=headers).status_code == 200
+
+    # このワーカーがまだグラフを読み込んでいない状態にする
+    graph = follow_graph.FollowGraph()
+    monkeypatch.setattr(follow_graph, "_graph", graph)
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    def create_task(title: str) -> int:
+        statements.clear()
+        event.listen(session.get_engine(), "before_cursor_execute", record)
+        try:
+            task_in = {"title": title, "privacy_level": "public"}
+            response = client.post(f"{API}/tasks/", json=task_in, headers=owner_headers)
+        finally:
+            event.remove(session.get_engine(), "before_cursor_execute", record)
+        assert response.status_code == 200, response.text
+        return response.json()["id"]
+
+    task_id = create_task("fanned out")
+    assert not graph.loaded
+    assert not [statement for statement in statements if "cacheversion" in statement]
+    inboxes = {row.user_id for row in db.query(TimelineEntry).filter(TimelineEntry.task_id == task_id)}
+    assert inboxes == {owner_id, *(follower_id for _, follower_id in followers)}
+
+    # 読み込み前も上限を超えるフォロワーの判定はできる
+    monkeypatch.setattr(settings, "TIMELINE_FANOUT_MAX_FOLLOWERS", 2)
+    task_id = create_task("pulled")
+    assert not graph.loaded
+    assert db.get(PulledAuthor, owner_id) is not None
+    assert {row.user_id for row in db.query(TimelineEntry).filter(TimelineEntry.task_id == task_id)} == {owner_id}
@@ -0,0 +1,115 @@
+# tests/test_hashing.py
+# パスワードハッシュ専用エグゼキューターの負荷試験
+# （同時ログインの上限と 503 の即時応答、ログインが集中している間のタイムラインの遅延）
+import asyncio
+import statistics
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from app.core import hashing
+from app.core.config import settings
+from tests.conftest import API
+
+
+def test_process_pool_uses_safe_start_method(monkeypatch):
+    monkeypatch.setattr(settings, "PASSWORD_HASH_USE_PROCESSES", True)
+    monkeypatch.setattr(hashing, "_executor", None)
+    try:
+        hashed = asyncio.run(hashing.get_password_hash("password123"))
+        assert asyncio.run(hashing.verify_password("password123", hashed))
+        executor = hashing.get_executor()
+        assert isinstance(executor, ProcessPoolExecutor)
+        assert executor._mp_context.get_start_method() == hashing.START_METHOD != "fork"
+    finally:
+        hashing.shutdown()
+
+
+def test_login_storm_is_bounded(client, monkeypatch):
+    form = {"username": "storm@example.com", "password": "password123"}
+    user = {"email": form["username"], "username": "storm", "password": form["password"]}
+    assert client.post(f"{API}/users/", json=user).status_code == 200
+    monkeypatch.setattr(hashing, "_slots", threading.BoundedSemaphore(2))
+    rejected_before = hashing.metrics.stats()["rejected"]
+
+    def login(_):
+        start = time.perf_counter()
+        response = client.post(f"{API}/login/access-token", data=form)
+        return response, time.perf_counter() - start
+
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        results = list(pool.map(login, range(32)))
+
+    ok = [elapsed for response, elapsed in results if response.status_code == 200]
+    busy = [(response, elapsed) for response, elapsed in results if response.status_code == 503]
+    assert len(ok) + len(busy) == len(results)
+    assert ok and busy
+    assert all(response.headers["Retry-After"] == "1" for response, _ in busy)
+    # 満杯のときはハッシュを待たずにすぐ返す
+    assert statistics.median(elapsed for _, elapsed in busy) < statistics.median(ok)
+    assert hashing.metrics.stats()["rejected"] - rejected_before == len(busy)
+
+
+def percentiles(samples):
+    ordered = sorted(samples)
+    return statistics.median(ordered), ordered[int(len(ordered) * 0.95) - 1]
+
+
+def test_timeline_latency_during_login_storm(client, make_user, monkeypatch):
+    # 本番と同じプロセスプール（nice 値を下げたワーカー）でハッシュする
+    monkeypatch.setattr(settings, "PASSWORD_HASH_USE_PROCESSES", True)
+    monkeypatch.setattr(hashing, "_executor", None)
+    hashing.start()
+    try:
+        viewer_headers, _ = make_user()
+        owner_headers, owner_id = make_user()
+        operations = [{"op": "create", "task": {"title": f"task {i}", "privacy_level": "public"}} for i in range(20)]
+        response = client.post(f"{API}/tasks/batch", json={"operations": operations}, headers=owner_headers)
+        assert response.status_code == 200, response.text
+        assert client.post(f"{API}/users/{owner_id}/follow", headers=viewer_headers).status_code == 200
+
+        # 各リクエストの直前に、ワーカー数を超えるハッシュが待っていたか（プールが埋まっていたか）
+        saturated = []
+
+        def timeline_latencies(count: int = 100):
+            latencies = []
+            for _ in range(count):
+                saturated.append(hashing.metrics.stats()["pending"] > settings.PASSWORD_HASH_WORKERS)
+                start = time.perf_counter()
+                assert client.get(f"{API}/timeline/", headers=viewer_headers).status_code == 200
+                latencies.append(time.perf_counter() - start)
+            return latencies
+
+        timeline_latencies(10)
+        baseline = percentiles(timeline_latencies())
+        assert not any(saturated)
+        saturated.clear()
+
+        form = {"username": "storm-timeline@example.com", "password": "password123"}
+        user = {"email": form["username"], "username": "storm-timeline", "password": form["password"]}
+        assert client.post(f"{API}/users/", json=user).status_code == 200
+        stop = threading.Event()
+        statuses = []
+
+        def storm():
+            while not stop.is_set():
+                statuses.append(client.post(f"{API}/login/access-token", data=form).status_code)
+
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            for _ in range(16):
+                pool.submit(storm)
+            # プールが埋まってから計測する
+            while hashing.metrics.stats()["pending"] <= settings.PASSWORD_HASH_WORKERS:
+                time.sleep(0.01)
+            under_load = percentiles(timeline_latencies())
+            stop.set()
+    finally:
+        hashing.shutdown()
+
+    assert set(statuses) <= {200, 503} and 200 in statuses
+    assert all(saturated)
+    # 1 CPU でも nice 値を下げたワーカーはリクエストに CPU を譲る: p50 は 2.5 倍 + 2 ms、p95 は 4 倍 + 5 ms まで
+    # （1 CPU での実測は p50 が 1.1〜2 倍、p95 が 1.5〜3 倍）
+    (base_p50, base_p95), (load_p50, load_p95) = baseline, under_load
+    assert load_p50 <= 2.5 * base_p50 + 0.002, (baseline, under_load)
+    assert load_p95 <= 4 * base_p95 + 0.005, (baseline, under_load)
@@ -0,0 +1,55 @@
+# tests/test_like_buffer.py
+# 書き込み遅延が有効なとき、未書き込みのいいね・いいね解除がいいね数に反映されることを確認する
+import pytest
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.services import like_buffer
+from tests.conftest import API
+
+
+@pytest.fixture
+def buffer(monkeypatch):
+    # 間隔を長くして、明示的に flush するまで書き込まれないようにする
+    buffer = like_buffer.LikeBuffer(SessionLocal, interval_ms=60_000, max_events=500)
+    monkeypatch.setattr(settings, "LIKE_WRITE_BEHIND", True)
+    monkeypatch.setattr(like_buffer, "_buffer", buffer)
+    yield buffer
+    buffer.close()
+
+
+def test_likes_count_includes_buffered_intents(client, make_user, buffer):
+    owner_headers, _ = make_user()
+    task_in = {"title": "buffered", "privacy_level": "public"}
+    task_id = client.post(f"{API}/tasks/", json=task_in, headers=owner_headers).json()["id"]
+    (first, first_id), (second, _), (third, _) = [make_user() for _ in range(3)]
+    like_url = f"{API}/tasks/{task_id}/like"
+
+    def likes_count() -> int:
+        response = client.get(f"{API}/tasks/{task_id}/likes")
+        assert response.status_code == 200, response.text
+        return response.json()
+
+    for headers in (first, second):
+        assert client.post(like_url, headers=headers).status_code == 200
+    assert likes_count() == 2
+    buffer.flush()
+    assert likes_count() == 2
+
+    assert client.post(like_url, headers=third).status_code == 200
+    assert likes_count() == 3
+    # いいね済みのユーザーの重複したいいねは数えない
+    assert client.post(like_url, headers=first).status_code == 200
+    assert likes_count() == 3
+    assert client.delete(like_url, headers=second).status_code == 200
+    assert likes_count() == 2
+    assert client.delete(like_url, headers=third).status_code == 200
+    assert likes_count() == 1
+    # 一覧は書き込み済みのいいねだけ
+    assert len(client.get(f"{API}/tasks/{task_id}/likes/users").json()) == 2
+
+    buffer.flush()
+    assert buffer.stats()["pending"] == 0
+    assert likes_count() == 1
+    assert client.get(f"{API}/tasks/{task_id}/likes/users").json() == [first_id]
+    assert client.get(f"{API}/tasks/0/likes").status_code == 404
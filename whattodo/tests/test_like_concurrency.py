@@ -0,0 +1,68 @@
+# tests/test_like_concurrency.py
+# 同じタスクへのいいね・いいね解除を多数のスレッドから同時に送り、行の重複や件数のずれが起きないことを確認する
+import random
+import threading
+from collections import Counter
+from typing import List
+
+from fastapi.testclient import TestClient
+from sqlalchemy import func
+
+from app.main import app
+from app.models.task import Task
+from app.models.task_like import TaskLike
+from tests.conftest import API
+
+THREADS = 16
+REQUESTS_PER_THREAD = 30
+
+
+def test_concurrent_likes_keep_rows_unique_and_counts_exact(client, db, make_user):
+    owner_headers, _ = make_user()
+    task_ids = []
+    for i in range(2):
+        task_in = {"title": f"hot {i}", "privacy_level": "public"}
+        response = client.post(f"{API}/tasks/", json=task_in, headers=owner_headers)
+        assert response.status_code == 200, response.text
+        task_ids.append(response.json()["id"])
+    # スレッド数より少ないユーザーで、同じユーザーのいいねも同時に届くようにする
+    users = [make_user()[0] for _ in range(THREADS // 2)]
+
+    # サーバー側の例外もステータス 500 として数える
+    hammer_client = TestClient(app, raise_server_exceptions=False)
+    statuses: Counter = Counter()
+    errors: List[str] = []
+    statuses_lock = threading.Lock()
+    start = threading.Barrier(THREADS)
+
+    def hammer(seed: int) -> None:
+        rng = random.Random(seed)
+        headers = users[seed % len(users)]
+        start.wait()
+        for _ in range(REQUESTS_PER_THREAD):
+            url = f"{API}/tasks/{rng.choice(task_ids)}/like"
+            response = (hammer_client.post if rng.random() < 0.6 else hammer_client.delete)(url, headers=headers)
+            with statuses_lock:
+                statuses[response.status_code] += 1
+                if response.status_code != 200:
+                    errors.append(response.text)
+
+    threads = [threading.Thread(target=hammer, args=(seed,)) for seed in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert statuses == {200: THREADS * REQUESTS_PER_THREAD}, errors[:5]
+
+    duplicates = (
+        db.query(TaskLike.task_id, TaskLike.user_id)
+        .filter(TaskLike.task_id.in_(task_ids))
+        .group_by(TaskLike.task_id, TaskLike.user_id)
+        .having(func.count() > 1)
+        .all()
+    )
+    assert duplicates == []
+    for task_id in task_ids:
+        likes = db.query(func.count(TaskLike.id)).filter(TaskLike.task_id == task_id).scalar()
+        assert db.get(Task, task_id).likes_count == likes
@@ -0,0 +1,16 @@
+# tests/test_metrics.py
+from app.core.config import settings
+from tests.conftest import API
+
+
+def test_metrics_disabled_by_default(client, make_user):
+    headers, _ = make_user()
+    assert client.get(f"{API}/metrics/", headers=headers).status_code == 404
+
+
+def test_metrics_when_enabled(client, make_user, monkeypatch):
+    monkeypatch.setattr(settings, "METRICS_ENABLED", True)
+    headers, _ = make_user()
+    response = client.get(f"{API}/metrics/", headers=headers)
+    assert response.status_code == 200
+    assert "principal_cache" in response.json()
@@ -0,0 +1,70 @@
+# tests/test_migrations.py
+import threading
+
+from sqlalchemy import create_engine, event, select
+
+from app.db import migrations
+
+
+def test_concurrent_upgrades_apply_each_step_once(tmp_path):
+    # ワーカーごとに別のエンジン（別の接続）から同時に移行する
+    url = f"sqlite:///{tmp_path / 'migrate.db'}"
+    engines = [create_engine(url) for _ in range(4)]
+    start = threading.Barrier(len(engines))
+    applied, errors = [], []
+
+    def upgrade(engine) -> None:
+        start.wait()
+        try:
+            applied.extend(migrations.upgrade(engine))
+        except Exception as exc:  # noqa: BLE001
+            errors.append(exc)
+
+    threads = [threading.Thread(target=upgrade, args=(engine,)) for engine in engines]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert sorted(applied) == sorted(name for _, name, _ in migrations.MIGRATIONS)
+    with engines[0].connect() as conn:
+        versions = conn.execute(select(migrations.schema_migrations.c.version)).scalars().all()
+    assert sorted(versions) == [version for version, _, _ in migrations.MIGRATIONS]
+    for engine in engines:
+        engine.dispose()
+
+
+def test_upgrade_is_a_no_op_when_current(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'current.db'}")
+    assert len(migrations.upgrade(engine)) == len(migrations.MIGRATIONS)
+    assert migrations.upgrade(engine) == []
+    engine.dispose()
+
+
+def test_upgrade_on_a_current_schema_only_reads(tmp_path):
+    url = f"sqlite:///{tmp_path / 'boot.db'}"
+    engine, read_engine = create_engine(url), create_engine(url)
+    migrations.upgrade(engine)
+
+    statements = {engine: [], read_engine: []}
+
+    def record(conn, cursor, statement, parameters, context, executemany) -> None:
+        statements[conn.engine].append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    event.listen(read_engine, "before_cursor_execute", record)
+
+    # 2回目以降の起動: 書き込み用のエンジンには触れず、読み込み用では SELECT / PRAGMA だけを実行する
+    assert migrations.upgrade(engine, read_engine) == []
+    assert statements[engine] == []
+    assert statements[read_engine]
+    assert all(statement.lstrip().upper().startswith(("SELECT", "PRAGMA")) for statement in statements[read_engine])
+
+    # 移行が残っていれば書き込み用のエンジンで適用する
+    with engine.begin() as conn:
+        conn.execute(migrations.schema_migrations.delete().where(migrations.schema_migrations.c.version == 10))
+    assert migrations.upgrade(engine, read_engine) == ["add_cache_versions"]
+    assert statements[engine]
+    engine.dispose()
+    read_engine.dispose()
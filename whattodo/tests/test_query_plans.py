@@ -0,0 +1,58 @@
+# tests/test_query_plans.py
+# ホットパスのクエリが全件スキャンに退行したら失敗する（python -m app.cli check-plans と同じ確認）
+import datetime
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app.db import migrations, query_plans
+from app.models.task import Task
+from app.models.task_like import TaskLike
+from app.models.timeline_entry import PulledAuthor, TimelineEntry
+from app.models.user import User
+from app.models.user_follow import UserFollow
+from app.services import follow_graph
+
+
+@pytest.fixture
+def plan_db(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'plans.db'}")
+    migrations.upgrade(engine)
+    # フォローグラフのキャッシュはプロセスで1つなので、この DB 用に差し替える
+    monkeypatch.setattr(follow_graph, "_graph", follow_graph.FollowGraph())
+    db = Session(bind=engine)
+    try:
+        yield db
+    finally:
+        db.close()
+        engine.dispose()
+
+
+def seed(db: Session) -> None:
+    # 各ホットパスが分岐の先まで実行されるよう、サンプルのユーザー・タスクに関係を持たせる
+    now = datetime.datetime.utcnow()
+    viewer, author, pulled = (User(email=f"{name}@example.com", username=name, hashed_password="x") for name in "abc")
+    db.add_all([viewer, author, pulled])
+    db.flush()
+    assert viewer.id == query_plans.SAMPLE_USER_ID
+    task = Task(title="sample task", owner_id=author.id, privacy_level="public", created_at=now, updated_at=now)
+    db.add(task)
+    db.flush()
+    assert task.id == query_plans.SAMPLE_TASK_ID
+    db.add_all(
+        [
+            UserFollow(follower_id=viewer.id, followed_id=author.id),
+            UserFollow(follower_id=viewer.id, followed_id=pulled.id),
+            PulledAuthor(user_id=pulled.id),
+            TimelineEntry(user_id=viewer.id, task_id=task.id, owner_id=author.id, created_at=now),
+            TaskLike(task_id=task.id, user_id=viewer.id),
+        ]
+    )
+    db.commit()
+
+
+def test_hot_paths_are_index_backed(plan_db):
+    seed(plan_db)
+    failures = query_plans.check_plans(plan_db)
+    assert failures == {}, "\n".join(f"{name}: {detail}" for name, rows in failures.items() for _, detail in rows)
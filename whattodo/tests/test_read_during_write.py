@@ -0,0 +1,66 @@
+# tests/test_read_during_write.py
+# SQLite 本番プロファイル: 書き込みトランザクションが開いたままでも、読み込み用エンジンの読み込みは待たされない
+import threading
+import time
+
+import pytest
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.db import session
+from app.db.base_class import Base
+
+READS = 50
+
+
+@pytest.fixture
+def split_engines(tmp_path, monkeypatch):
+    monkeypatch.setattr(session, "SQLALCHEMY_DATABASE_URL", f"sqlite:///{tmp_path / 'split.db'}")
+    monkeypatch.setattr(settings, "SQLITE_PRODUCTION_MODE", True)
+    session.get_engine.cache_clear()
+    session.get_read_engine.cache_clear()
+    try:
+        writer, reader = session.get_engine(), session.get_read_engine()
+        assert writer is not reader
+        Base.metadata.create_all(writer)
+        yield writer, reader
+    finally:
+        session.dispose_engines()
+        session.get_engine.cache_clear()
+        session.get_read_engine.cache_clear()
+
+
+def test_reads_do_not_wait_for_open_write_transaction(split_engines):
+    writer, reader = split_engines
+    with writer.begin() as conn:
+        conn.execute(text("INSERT INTO user (email, username, hashed_password) VALUES ('a@example.com', 'a', 'x')"))
+
+    holding, release = threading.Event(), threading.Event()
+
+    def hold_write() -> None:
+        with writer.connect() as conn:
+            conn.exec_driver_sql("BEGIN IMMEDIATE")
+            conn.execute(text("INSERT INTO user (email, username, hashed_password) VALUES ('b@example.com', 'b', 'x')"))
+            holding.set()
+            release.wait()
+            conn.rollback()
+
+    thread = threading.Thread(target=hold_write)
+    thread.start()
+    try:
+        assert holding.wait(5)
+        latencies = []
+        for _ in range(READS):
+            start = time.perf_counter()
+            with reader.connect() as conn:
+                # 書き込み中の行は見えず、コミット済みのスナップショットを読む
+                assert conn.execute(text("SELECT count(*) FROM user")).scalar() == 1
+            latencies.append(time.perf_counter() - start)
+    finally:
+        release.set()
+        thread.join()
+
+    latencies.sort()
+    # 書き込みを待つと busy_timeout（既定 5 秒）まで止まる
+    assert latencies[-1] < 0.5, latencies[-5:]
+    assert latencies[len(latencies) // 2] < 0.05
@@ -0,0 +1,40 @@
+# tests/test_search.py
+# 検索結果の可視性（フォロー中のユーザーのフォロワー限定タスクだけ）と、可視性で絞り込んだ後のページングを確認する
+from tests.conftest import API
+
+
+def test_search_visibility_and_paging(client, make_user):
+    viewer_headers, viewer_id = make_user()
+    followed_headers, followed_id = make_user()
+    stranger_headers, _ = make_user()
+    assert client.post(f"{API}/users/{followed_id}/follow", headers=viewer_headers).status_code == 200
+
+    expected = set()
+    # 見えないタスクを見えるタスクの間に挟んで、1回の読み込みでページが埋まらないようにする
+    for i in range(6):
+        for headers, privacy_level, visible in (
+            (stranger_headers, "followers", False),
+            (stranger_headers, "private", False),
+            (followed_headers, "followers", True),
+            (followed_headers, "private", False),
+            (stranger_headers, "public", True),
+            (viewer_headers, "private", True),
+        ):
+            task_in = {"title": f"zebracorn {i}", "privacy_level": privacy_level}
+            response = client.post(f"{API}/tasks/", json=task_in, headers=headers)
+            assert response.status_code == 200, response.text
+            if visible:
+                expected.add(response.json()["id"])
+
+    def search(skip: int, limit: int):
+        params = {"q": "zebracorn", "skip": skip, "limit": limit}
+        response = client.get(f"{API}/search/tasks", params=params, headers=viewer_headers)
+        assert response.status_code == 200, response.text
+        return [item["id"] for item in response.json()]
+
+    everything = search(0, 100)
+    assert set(everything) == expected and len(everything) == len(expected)
+    pages = [search(skip, 4) for skip in range(0, len(expected), 4)]
+    assert [task_id for page in pages for task_id in page] == everything
+    assert all(len(page) == 4 for page in pages[:-1])
+    assert search(len(expected), 4) == []
@@ -0,0 +1,36 @@
+# tests/test_timeline_etag.py
+from tests.conftest import API
+
+
+def test_timeline_etag_tracks_page_changes(client, make_user):
+    viewer, _ = make_user()
+    author, author_id = make_user()
+    other, other_id = make_user()
+    liker, _ = make_user()
+    assert client.post(f"{API}/users/{author_id}/follow", headers=viewer).status_code == 200
+    task = client.post(f"{API}/tasks/", json={"title": "first", "privacy_level": "public"}, headers=author)
+    task_id = task.json()["id"]
+
+    def revalidate(etag):
+        response = client.get(f"{API}/timeline/", headers={**viewer, "If-None-Match": etag})
+        return response.status_code, response.headers["ETag"]
+
+    etag = client.get(f"{API}/timeline/", headers=viewer).headers["ETag"]
+    assert revalidate(etag) == (304, etag)
+
+    # フォローしていないユーザーの変更ではタイムラインは変わらない
+    client.post(f"{API}/tasks/", json={"title": "unrelated", "privacy_level": "public"}, headers=other)
+    assert revalidate(etag) == (304, etag)
+
+    changes = [
+        lambda: client.post(f"{API}/tasks/{task_id}/like", headers=liker),
+        lambda: client.put(f"{API}/tasks/{task_id}", json={"title": "edited"}, headers=author),
+        lambda: client.post(f"{API}/tasks/", json={"title": "second", "privacy_level": "public"}, headers=author),
+        lambda: client.post(f"{API}/users/{other_id}/follow", headers=viewer),
+    ]
+    for change in changes:
+        assert change().status_code == 200
+        status, new_etag = revalidate(etag)
+        assert status == 200 and new_etag != etag
+        etag = new_etag
+